@@ -0,0 +1,154 @@
+from typing import Callable, Mapping, Tuple
+import queue
+import threading
+import time
+from mine_sweeper_ai import MinesweeperAI
+
+# Runs a MinesweeperAI on a thread of its own, so working out a move never
+# blocks the thread that asked for it.
+#
+# The worker owns the AI: once it is started, the AI is only touched from
+# the worker thread.  Requests go to it through one queue and are handled in
+# the order they were made, so a move asked for after some knowledge was
+# added is worked out with that knowledge.  Replies come back through another
+# queue, and notify, if given, is called from the worker thread after each
+# reply is queued.  It must be safe to call from any thread, posting a pygame
+# event for example, and should do nothing more than wake the other thread.
+#
+#   worker = AIWorker(MinesweeperAI(16, 16, 40), notify)
+#   worker.add_knowledge(result.codes)
+#   worker.request_move()
+#   ...
+#   reply = worker.get_reply(block=False)
+
+# kinds of requests and replies
+MOVE = "move"
+KNOWN_MINES = "known_mines"
+KNOWLEDGE = "knowledge"
+RESET = "reset"
+ERROR = "error"
+STOP = "stop"
+
+# A reply of the worker.  For a MOVE, value is the cell to reveal, or None if
+# there are no cells left, and safe is True if the AI knows it is safe.  For
+# KNOWN_MINES, value is a frozenset of the cells the AI knows are mines.  An
+# ERROR, with value the message, replies to a request the AI failed on, or
+# to the first request after knowledge it failed to add.  known_mines
+# is the number of mines the AI knew of when it replied, and elapsed the time
+# spent on the request in seconds.
+class AIReply():
+    def __init__(self,
+                 kind: str,
+                 value,
+                 known_mines: int,
+                 elapsed: float,
+                 safe: bool = False) -> None:
+        self.kind = kind
+        self.value = value
+        self.known_mines = known_mines
+        self.elapsed = elapsed
+        self.safe = safe
+
+class AIWorker():
+    def __init__(self, ai: MinesweeperAI, notify: Callable[[], None] = None) -> None:
+        self.ai = ai
+        self.notify = notify
+        self._requests: queue.Queue = queue.Queue()
+        self._replies: queue.Queue = queue.Queue()
+
+        # requests waiting for a reply and when the oldest one was made.  Only the thread
+        # that makes requests and takes the replies touches these.
+        self._waiting = 0
+        self._waiting_since = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="MinesweeperAI", daemon=True)
+        self._thread.start()
+
+    # True while a request that gets a reply has not been answered
+    @property
+    def busy(self) -> bool:
+        return self._waiting > 0
+
+    # seconds since the oldest request still waiting for its reply was made
+    @property
+    def busy_time(self) -> float:
+        return time.perf_counter() - self._waiting_since if self._waiting > 0 else 0.0
+
+    # gives the AI the codes of the cells revealed by a move.  There is no reply.
+    def add_knowledge(self, updates: Mapping[Tuple[int, int], int]) -> None:
+        self._requests.put((KNOWLEDGE, updates))
+
+    # makes the AI forget the game so far, for a new game on a board of the same size.
+    # There is no reply, and requests made before are still handled.
+    def reset(self) -> None:
+        self._requests.put((RESET, None))
+
+    # asks for the next move, a safe one if there is one, otherwise the lowest risk one
+    def request_move(self) -> None:
+        self._request(MOVE)
+
+    # asks for the cells the AI knows are mines
+    def request_known_mines(self) -> None:
+        self._request(KNOWN_MINES)
+
+    def _request(self, kind: str) -> None:
+        if self._waiting == 0:
+            self._waiting_since = time.perf_counter()
+        self._waiting += 1
+        self._requests.put((kind, None))
+
+    # Returns the next reply, or None if there is none.  Like Queue.get, block waits for
+    # one, for at most timeout seconds if it is given.
+    def get_reply(self, block: bool = True, timeout: float = None) -> AIReply:
+        try:
+            reply = self._replies.get(block, timeout)
+        except queue.Empty:
+            return None
+        self._waiting -= 1
+        if self._waiting > 0:
+            self._waiting_since = time.perf_counter()
+        return reply
+
+    # Stops the worker once it has handled the requests made before.  Requests made after
+    # are never handled.  With wait set, blocks until the worker thread has finished.
+    def stop(self, wait: bool = False) -> None:
+        self._requests.put((STOP, None))
+        if wait:
+            self._thread.join()
+
+    def _run(self) -> None:
+        # an error adding knowledge, which is given as the reply to the next request.  Any
+        # error is caught, since a worker that stopped would leave requests without a reply.
+        error = None
+        while True:
+            (kind, value) = self._requests.get()
+            if kind == STOP:
+                return
+            if kind == KNOWLEDGE:
+                try:
+                    self.ai.add_knowledge_many(value)
+                except Exception as exception:
+                    error = error or str(exception)
+                continue
+            if kind == RESET:
+                self.ai.reset(self.ai.mine_count)
+                error = None
+                continue
+
+            start = time.perf_counter()
+            safe = False
+            try:
+                if error is not None:
+                    (kind, value, error) = (ERROR, error, None)
+                elif kind == MOVE:
+                    move = self.ai.get_safe_move()
+                    safe = move is not None
+                    value = move if safe else self.ai.get_lowest_risk_move()
+                elif kind == KNOWN_MINES:
+                    value = frozenset(self.ai.known_mine_cells)
+            except Exception as exception:
+                (kind, value) = (ERROR, str(exception))
+            self._replies.put(AIReply(kind, value, len(self.ai.known_mine_cells),
+                                      time.perf_counter() - start, safe))
+            if self.notify is not None:
+                self.notify()
@@ -18,22 +18,28 @@ class Button(pygame.sprite.DirtySprite):
         self.image_hover.fill(pygame.Color('red3'))
         self.image_down = pygame.transform.scale(pygame.Surface((100, 40)), (width, height))
         self.image_down.fill(pygame.Color('red4'))
-        self.text = text
         self.image = self.image_normal 
         self.rect = self.image.get_rect(topleft=(x, y))
-
-        image_center = self.image.get_rect().center
-        text_surf = self.FONT.render(text, True, pygame.Color('white'))
-        text_rect = text_surf.get_rect(center=image_center)
-        # Blit the text onto the images.
-        for image in (self.image_normal, self.image_hover, self.image_down):
-            image.blit(text_surf, text_rect)
+        self._render_text(text)
 
         # This function will be called when the button gets pressed.
         self.button_click = click
         self.button_down = False
         self.is_hovered = False
  
+    # fills the images with their colors and blits the text onto them
+    def _render_text(self, text: str) -> None:
+        self.text = text
+        text_surf = self.FONT.render(text, True, pygame.Color('white'))
+        text_rect = text_surf.get_rect(center=self.image.get_rect().center)
+        for (image, color) in ((self.image_normal, 'red'), (self.image_hover, 'red3'), (self.image_down, 'red4')):
+            image.fill(pygame.Color(color))
+            image.blit(text_surf, text_rect)
+
+    def update_text(self, text: str) -> None:
+        self._render_text(text)
+        self.dirty = 1
+
     def update(self, event: pygame.event.Event) -> None:
         if event.type == pygame.MOUSEBUTTONDOWN:
             if self.rect.collidepoint(event.pos):
@@ -48,11 +54,13 @@ class Button(pygame.sprite.DirtySprite):
                 self.dirty = 1
             self.button_down = False
         elif event.type == pygame.MOUSEMOTION:
+            # only changes of hover are redrawn, not every move of the mouse
             collided = self.rect.collidepoint(event.pos)
-            if collided and not self.button_down:
+            if collided and not self.button_down and not self.is_hovered:
                 self.image = self.image_hover
                 self.is_hovered = True
                 self.dirty = 1
             elif not collided and self.is_hovered:
                 self.image = self.image_normal
+                self.is_hovered = False
                 self.dirty = 1
\ No newline at end of file
@@ -0,0 +1,72 @@
+from typing import Dict
+import pygame
+
+from mine_sweeper import MoveResult
+
+# Every look a cell of the minefield can have, rendered once side by side on
+# one surface: the numbers 0 to 8, a mine, a flag and a hidden cell, at the
+# x position code * cell_size for each MoveResult code.  The board is drawn
+# by blitting areas of the atlas, so nothing is rendered as cells change.
+class GlyphAtlas():
+    # height of the numbers as a part of the cell size, and the least height in pixels they
+    # get on small cells, as long as it fits inside the cell's border
+    DIGIT_SCALE = 0.45
+    MIN_DIGIT_HEIGHT = 7
+
+    # numbers smaller than this are drawn without antialiasing, which only blurs them
+    ANTIALIAS_HEIGHT = 10
+
+    def __init__(self, cell_size: int) -> None:
+        self.cell_size = cell_size
+        self.surface = pygame.Surface((cell_size * len(MoveResult.TEXT), cell_size))
+        self.surface.fill((0, 0, 0))
+
+        digit_height = max(round(cell_size * GlyphAtlas.DIGIT_SCALE),
+                           min(cell_size - 2, GlyphAtlas.MIN_DIGIT_HEIGHT))
+        font = _font_for(digit_height)
+        antialias = digit_height >= GlyphAtlas.ANTIALIAS_HEIGHT
+        flag = pygame.transform.scale(pygame.image.load("assets/images/flag.png"), (cell_size, cell_size))
+        mine = pygame.transform.scale(pygame.image.load("assets/images/mine.png"), (cell_size, cell_size))
+
+        for code in range(len(MoveResult.TEXT)):
+            inside = pygame.Rect(code * cell_size + 1, 1, cell_size - 2, cell_size - 2)
+            center = (code * cell_size + cell_size / 2, cell_size / 2)
+            if code <= 8:
+                self.surface.fill(pygame.Color('white'), inside)
+                if code != 0:
+                    text = font.render(str(code), antialias, pygame.Color('black'))
+                    self.surface.blit(text, text.get_rect(center=center))
+            else:
+                self.surface.fill(pygame.Color('red'), inside)
+                if code == MoveResult.MINE:
+                    self.surface.blit(mine, mine.get_rect(center=center))
+                elif code == MoveResult.FLAG:
+                    self.surface.blit(flag, flag.get_rect(center=center))
+
+    # the area of the atlas with the look of a code
+    def area(self, code: int) -> pygame.Rect:
+        return pygame.Rect(code * self.cell_size, 0, self.cell_size, self.cell_size)
+
+# returns the largest font whose numbers are at most height pixels tall
+def _font_for(height: int) -> pygame.font.Font:
+    size = height
+    font = pygame.font.SysFont("arial", size)
+    while size > 1 and font.render("8", False, (0, 0, 0)).get_bounding_rect().height > height:
+        size -= 1
+        font = pygame.font.SysFont("arial", size)
+    while True:
+        larger = pygame.font.SysFont("arial", size + 1)
+        if larger.render("8", False, (0, 0, 0)).get_bounding_rect().height > height:
+            return font
+        (size, font) = (size + 1, larger)
+
+# atlases that have been built, by cell size
+_atlases: Dict[int, GlyphAtlas] = {}
+
+# returns the atlas for a cell size, building it the first time it is asked for
+def get_atlas(cell_size: int) -> GlyphAtlas:
+    atlas = _atlases.get(cell_size)
+    if atlas is None:
+        atlas = GlyphAtlas(cell_size)
+        _atlases[cell_size] = atlas
+    return atlas
@@ -1,52 +1,310 @@
-from typing import Dict, List, Tuple
+from collections import OrderedDict
+from typing import List, Mapping, Tuple
 import pygame
 
-from controls.grid_tile import GridTile
+from controls.glyph_atlas import get_atlas
 from mine_sweeper import MoveResult
 
 
+# A scrolling, zooming view of the grid of cells of a game.
+#
+# Each cell is a single byte holding the MoveResult code of what it shows.
+# The board is split into square chunks of about CHUNK_SIZE pixels that are
+# only rendered, by blitting from the glyph atlas of the cell size, once they
+# scroll into view, and the most recently seen MAX_CHUNKS of them are kept.
+# Cells that change are redrawn on their own, the whole view only when it
+# moves.  If a minimap rect is given, the whole board is shown there at one
+# pixel per cell, scaled to fit, with the area in view outlined.
+#
+# Left click reveals a cell, dragging with the right or middle button or the
+# arrow keys pan, and the mouse wheel or +/- zoom.  A click on the minimap
+# moves the view there.
 class Minefield():
     FIELD_PADDING = 20
-    def __init__(self, 
-                 screen_height: int, 
-                 screen_width: int, 
-                 cell_height: int = 8, 
+
+    # a draw with more dirty cells than this redraws the whole view instead
+    MAX_DIRTY_RECTS = 64
+
+    # smallest and largest cell size in pixels the view zooms to
+    MIN_CELL_SIZE = 8
+    MAX_CELL_SIZE = 64
+
+    # change in cell size of one step of zoom
+    ZOOM_STEP = 1.25
+
+    # Chunks are about the same size in pixels at every zoom, rather than the same number of
+    # cells, so the MAX_CHUNKS kept take at most about 32 MB however far the view is zoomed in
+    CHUNK_SIZE = 256
+    MAX_CHUNKS = 128
+
+    # colors of the codes on the minimap
+    MINIMAP_COLORS = [(200, 200, 200)] * 9 + [(0, 0, 0), (255, 165, 0), (200, 0, 0)]
+
+    def __init__(self,
+                 screen_height: int,
+                 screen_width: int,
+                 cell_height: int = 8,
                  cell_width: int = 8,
-                 callback = None) -> None:
-        self.font = pygame.font.SysFont("arial", 22)
+                 callback = None,
+                 minimap_rect: pygame.Rect = None) -> None:
         self.screen_height = screen_height
         self.screen_width = screen_width
         self.cell_height = cell_height
         self.cell_width = cell_width
-        self.cell_grid:List[List[GridTile]] = []
-        self.cell_sprites = pygame.sprite.LayeredDirty()
         self.callback = callback
-        cell_size = min(self.screen_width//self.cell_width,
-                        self.screen_height//self.cell_height)
-        
-        flag = pygame.image.load("assets/images/flag.png")
-        flag = pygame.transform.scale(flag, (cell_size, cell_size))
-        mine = pygame.image.load("assets/images/mine.png")
-        mine = pygame.transform.scale(mine, (cell_size, cell_size))
-
-        for i in range(self.cell_height):
-            self.cell_grid.append([])
-            for j in range(self.cell_width):
-                tile = GridTile(i, j, cell_size, self.font, flag, mine, self.click_handler)
-                self.cell_grid[i].append(tile)
-                self.cell_sprites.add(tile)
-       
-      
+        self.view = pygame.Rect(0, 0, screen_width, screen_height)
+        self.minimap_rect = minimap_rect
+
+        # the cell the mouse button went down on, it is clicked if the button comes up on it too
+        self.pressed_cell: Tuple[int, int] = None
+        self._panning = False
+        self._minimap_down = False
+
+        self.cells = bytearray([MoveResult.HIDDEN]) * (cell_height * cell_width)
+        self._chunks: OrderedDict = OrderedDict()
+
+        # flat indexes of the cells that changed since the last draw, and whether the whole
+        # view or the minimap needs to be drawn again
+        self._dirty_cells: List[int] = []
+        self._redraw = True
+        self._minimap_image: pygame.Surface = None
+
+        # position of the view on the board in pixels, set by set_cell_size
+        self.scroll_x = 0
+        self.scroll_y = 0
+        self.cell_size = 0
+        fit = min(screen_width // cell_width, screen_height // cell_height)
+        self.set_cell_size(max(Minefield.MIN_CELL_SIZE, min(Minefield.MAX_CELL_SIZE, fit)))
+
+    # Changes the size of the cells, keeping the point of the board at anchor, a position on
+    # the screen, where it is.  The center of the view is kept if no anchor is given.
+    def set_cell_size(self, cell_size: int, anchor: Tuple[int, int] = None) -> None:
+        if cell_size == self.cell_size:
+            return
+        if anchor is None:
+            anchor = self.view.center
+        (x, y) = (anchor[0] - self.view.x, anchor[1] - self.view.y)
+        if self.cell_size > 0:
+            scale = cell_size / self.cell_size
+            self.scroll_x = round((self.scroll_x + x) * scale - x)
+            self.scroll_y = round((self.scroll_y + y) * scale - y)
+
+        self.cell_size = cell_size
+        self.chunk_cells = max(1, Minefield.CHUNK_SIZE // cell_size)
+        self.atlas = get_atlas(cell_size)
+        self._areas = [self.atlas.area(code) for code in range(len(MoveResult.TEXT))]
+        self._chunks.clear()
+        self._redraw = True
+        self.scroll_to(self.scroll_x, self.scroll_y)
+
+    # zooms in by the given number of steps, or out if it is negative
+    def zoom(self, steps: int, anchor: Tuple[int, int] = None) -> None:
+        cell_size = round(self.cell_size * Minefield.ZOOM_STEP ** steps)
+        if cell_size == self.cell_size:
+            cell_size += 1 if steps > 0 else -1
+        self.set_cell_size(max(Minefield.MIN_CELL_SIZE, min(Minefield.MAX_CELL_SIZE, cell_size)), anchor)
+
+    # moves the top left of the view to a position on the board in pixels, kept on the board
+    def scroll_to(self, x: int, y: int) -> None:
+        x = max(0, min(x, self.cell_width * self.cell_size - self.view.width))
+        y = max(0, min(y, self.cell_height * self.cell_size - self.view.height))
+        if (x, y) != (self.scroll_x, self.scroll_y):
+            (self.scroll_x, self.scroll_y) = (x, y)
+            self._redraw = True
+
+    # moves the view so that the given cell is in the middle of it
+    def center_on(self, row: float, col: float) -> None:
+        self.scroll_to(round(col * self.cell_size - self.view.width / 2),
+                       round(row * self.cell_size - self.view.height / 2))
 
     def update(self, event):
-        if event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.MOUSEBUTTONUP:
-            self.cell_sprites.update(event)
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1 and self.minimap_rect is not None and self.minimap_rect.collidepoint(event.pos):
+                self._minimap_down = True
+                self._center_on_minimap(event.pos)
+            elif event.button == 1:
+                self.pressed_cell = self.cell_at(event.pos)
+            elif event.button in (2, 3) and self.view.collidepoint(event.pos):
+                self._panning = True
+        elif event.type == pygame.MOUSEBUTTONUP:
+            if event.button == 1:
+                cell = self.cell_at(event.pos)
+                if cell is not None and cell == self.pressed_cell:
+                    self.click_handler(cell[0], cell[1])
+                self.pressed_cell = None
+                self._minimap_down = False
+            elif event.button in (2, 3):
+                self._panning = False
+        elif event.type == pygame.MOUSEMOTION:
+            if self._panning:
+                self.scroll_to(self.scroll_x - event.rel[0], self.scroll_y - event.rel[1])
+            elif self._minimap_down:
+                self._center_on_minimap(event.pos)
+        elif event.type == pygame.MOUSEWHEEL:
+            pos = pygame.mouse.get_pos()
+            if self.view.collidepoint(pos):
+                self.zoom(event.y, pos)
+        elif event.type == pygame.KEYDOWN:
+            (step_x, step_y) = (self.view.width // 4, self.view.height // 4)
+            if event.key == pygame.K_LEFT:
+                self.scroll_to(self.scroll_x - step_x, self.scroll_y)
+            elif event.key == pygame.K_RIGHT:
+                self.scroll_to(self.scroll_x + step_x, self.scroll_y)
+            elif event.key == pygame.K_UP:
+                self.scroll_to(self.scroll_x, self.scroll_y - step_y)
+            elif event.key == pygame.K_DOWN:
+                self.scroll_to(self.scroll_x, self.scroll_y + step_y)
+            elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                self.zoom(1)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.zoom(-1)
+
+    # returns the (row, col) of the cell at a position on the screen, or None if it is off the grid
+    def cell_at(self, pos: Tuple[int, int]) -> Tuple[int, int]:
+        if not self.view.collidepoint(pos):
+            return None
+        x = pos[0] - self.view.x + self.scroll_x
+        y = pos[1] - self.view.y + self.scroll_y
+        (row, col) = (y // self.cell_size, x // self.cell_size)
+        if row >= self.cell_height or col >= self.cell_width:
+            return None
+        return (row, col)
 
     def click_handler(self, x, y):
         action_status:MoveResult = self.callback(x,y)
         if action_status is not None:
-            self.update_cells(action_status.updates)
+            self.update_cells(action_status.codes)
+
+    # updates: map from cell to its MoveResult code, such as MoveResult.codes
+    def update_cells(self, updates:Mapping[Tuple[int,int], int]):
+        size = self.cell_size
+        chunk_cells = self.chunk_cells
+        atlas = self.atlas.surface
+        for (i, j), code in updates.items():
+            index = i * self.cell_width + j
+            if self.cells[index] == code:
+                continue
+            self.cells[index] = code
+            self._dirty_cells.append(index)
+
+            # chunks that have been rendered are kept up to date
+            chunk = self._chunks.get((i // chunk_cells, j // chunk_cells))
+            if chunk is not None:
+                chunk.blit(atlas, ((j % chunk_cells) * size, (i % chunk_cells) * size), self._areas[code])
+        self._minimap_image = None
+
+    # returns the surface of a chunk, rendering it if it is not kept
+    def _chunk(self, chunk_row: int, chunk_col: int) -> pygame.Surface:
+        key = (chunk_row, chunk_col)
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            return chunk
+
+        size = self.cell_size
+        chunk_cells = self.chunk_cells
+        rows = min(chunk_cells, self.cell_height - chunk_row * chunk_cells)
+        cols = min(chunk_cells, self.cell_width - chunk_col * chunk_cells)
+        chunk = pygame.Surface((cols * size, rows * size))
+        self._render_chunk(chunk, chunk_row, chunk_col)
+
+        self._chunks[key] = chunk
+        if len(self._chunks) > Minefield.MAX_CHUNKS:
+            self._chunks.popitem(last=False)
+        return chunk
+
+    # blits the cells of a chunk onto its surface
+    def _render_chunk(self, chunk: pygame.Surface, chunk_row: int, chunk_col: int) -> None:
+        size = self.cell_size
+        chunk_cells = self.chunk_cells
+        (first_row, first_col) = (chunk_row * chunk_cells, chunk_col * chunk_cells)
+        cols = chunk.get_width() // size
+        atlas = self.atlas.surface
+        blits = []
+        for r in range(chunk.get_height() // size):
+            start = (first_row + r) * self.cell_width + first_col
+            for c, code in enumerate(self.cells[start:start + cols]):
+                blits.append((atlas, (c * size, r * size), self._areas[code]))
+        chunk.blits(blits, False)
+
+    # Hides every cell again for a new game on a board of the same size, keeping the zoom and
+    # position of the view.  The chunks in view are rendered again on the surfaces they already
+    # have and the others are let go, to be rendered when they come back into view.
+    def reset(self) -> None:
+        self.cells[:] = bytes([MoveResult.HIDDEN]) * len(self.cells)
+        size = self.cell_size * self.chunk_cells
+        visible = pygame.Rect(self.scroll_x, self.scroll_y, self.view.width, self.view.height)
+        for (chunk_row, chunk_col), chunk in list(self._chunks.items()):
+            area = pygame.Rect(chunk_col * size, chunk_row * size, chunk.get_width(), chunk.get_height())
+            if visible.colliderect(area):
+                self._render_chunk(chunk, chunk_row, chunk_col)
+            else:
+                del self._chunks[(chunk_row, chunk_col)]
+        self.pressed_cell = None
+        self._dirty_cells.clear()
+        self._minimap_image = None
+        self._redraw = True
+
+    # Puts what changed since the last draw on the screen and returns the rects of the screen
+    # that need to be updated
+    def draw(self, screen: pygame.Surface) -> List[pygame.Rect]:
+        dirty = []
+        view = self.view
+        size = self.cell_size
+        screen.set_clip(view)
+        if self._redraw or len(self._dirty_cells) > Minefield.MAX_DIRTY_RECTS:
+            screen.fill((0, 0, 0), view)
+            chunk_size = self.chunk_cells * size
+            first_row = self.scroll_y // chunk_size
+            last_row = min((self.scroll_y + view.height - 1) // chunk_size,
+                           (self.cell_height - 1) // self.chunk_cells)
+            first_col = self.scroll_x // chunk_size
+            last_col = min((self.scroll_x + view.width - 1) // chunk_size,
+                           (self.cell_width - 1) // self.chunk_cells)
+            for chunk_row in range(first_row, last_row + 1):
+                for chunk_col in range(first_col, last_col + 1):
+                    screen.blit(self._chunk(chunk_row, chunk_col),
+                                (view.x + chunk_col * chunk_size - self.scroll_x,
+                                 view.y + chunk_row * chunk_size - self.scroll_y))
+            dirty.append(view)
+            if self.minimap_rect is not None:
+                dirty.append(self._draw_minimap(screen))
+        else:
+            for index in self._dirty_cells:
+                (i, j) = divmod(index, self.cell_width)
+                rect = pygame.Rect(view.x + j * size - self.scroll_x, view.y + i * size - self.scroll_y, size, size)
+                if rect.colliderect(view):
+                    screen.blit(self.atlas.surface, rect, self._areas[self.cells[index]])
+                    dirty.append(rect.clip(view))
+            if self.minimap_rect is not None and self._minimap_image is None:
+                dirty.append(self._draw_minimap(screen))
+        screen.set_clip(None)
+
+        self._dirty_cells = []
+        self._redraw = False
+        return dirty
+
+    # draws the board at one pixel per cell, scaled to fit the minimap, with the view outlined
+    def _draw_minimap(self, screen: pygame.Surface) -> pygame.Rect:
+        minimap = self.minimap_rect
+        scale = min(minimap.width / self.cell_width, minimap.height / self.cell_height)
+        if self._minimap_image is None:
+            image = pygame.image.frombuffer(self.cells, (self.cell_width, self.cell_height), "P")
+            image.set_palette(Minefield.MINIMAP_COLORS)
+            self._minimap_image = pygame.transform.scale(
+                image, (max(1, round(self.cell_width * scale)), max(1, round(self.cell_height * scale))))
+
+        screen.set_clip(minimap)
+        screen.fill((0, 0, 0), minimap)
+        screen.blit(self._minimap_image, minimap.topleft)
+        pixels = scale / self.cell_size
+        outline = pygame.Rect(minimap.x + self.scroll_x * pixels, minimap.y + self.scroll_y * pixels,
+                              max(2, self.view.width * pixels), max(2, self.view.height * pixels))
+        pygame.draw.rect(screen, (255, 255, 255), outline.clip(minimap), 1)
+        screen.set_clip(self.view)
+        return minimap
 
-    def update_cells(self, updates:Dict[Tuple[int,int], str]):
-        for key, value in updates.items():
-            self.cell_grid[key[0]][key[1]].update_text(value)
+    # centers the view on the cell under a position on the minimap
+    def _center_on_minimap(self, pos: Tuple[int, int]) -> None:
+        scale = min(self.minimap_rect.width / self.cell_width, self.minimap_rect.height / self.cell_height)
+        self.center_on((pos[1] - self.minimap_rect.y) / scale, (pos[0] - self.minimap_rect.x) / scale)
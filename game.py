@@ -1,31 +1,63 @@
+import argparse
 import pygame
 from windows.game_window import GameWindow
 
-# Simple game class for running the PyGame
+# Simple game class for running the PyGame.  By default the main loop is
+# event driven: it sleeps until there is input, or until IDLE_TIMEOUT has
+# passed, and the window only redraws what changed.  With event_driven set
+# to False it polls for input and redraws every frame instead.
 class MinesweeperGame():
-    def __init__(self) -> None:
+
+    # longest the event driven loop sleeps without input, in milliseconds
+    IDLE_TIMEOUT = 500
+
+    # most frames drawn per second
+    FRAME_RATE = 60
+
+    def __init__(self, 
+                 event_driven: bool = True,
+                 rows: int = GameWindow.ROWS,
+                 cols: int = GameWindow.COLS,
+                 mines: int = GameWindow.MINES,
+                 auto_rate: float = GameWindow.AUTO_RATE) -> None:
         pygame.init()
-        self.current_window:GameWindow = GameWindow()
+        self.current_window:GameWindow = GameWindow(rows, cols, mines, auto_rate)
         self.running = True
+        self.event_driven = event_driven
         self.clock = pygame.time.Clock()
 
     # main loop that will run intil game is exited
     def start(self) -> None:
         while self.running:
-            for event in pygame.event.get():
+            if self.event_driven:
+                events = [pygame.event.wait(MinesweeperGame.IDLE_TIMEOUT)] + pygame.event.get()
+            else:
+                events = pygame.event.get()
+
+            for event in events:
                 if event.type == pygame.QUIT:
                     self.running = False
-                
+
                 # send events to the current window 
-                self.current_window.update(event)
+                elif event.type != pygame.NOEVENT:
+                    self.current_window.update(event)
             
             # redraw the windows
             self.current_window.draw()  
-            self.clock.tick(60)
+            self.clock.tick(MinesweeperGame.FRAME_RATE)
 
     def quit(self) -> None:
+        self.current_window.close()
         pygame.quit()
 
-game = MinesweeperGame()
+parser = argparse.ArgumentParser(description="Play Minesweeper with the AI.")
+parser.add_argument("--rows", type=int, default=GameWindow.ROWS, help="rows on the board")
+parser.add_argument("--cols", type=int, default=GameWindow.COLS, help="columns on the board")
+parser.add_argument("--mines", type=int, default=GameWindow.MINES, help="number of mines")
+parser.add_argument("--auto-rate", type=float, default=GameWindow.AUTO_RATE,
+                    help="moves per second made by auto play")
+args = parser.parse_args()
+
+game = MinesweeperGame(rows=args.rows, cols=args.cols, mines=args.mines, auto_rate=args.auto_rate)
 game.start()
-game.quit()
\ No newline at end of file
+game.quit()
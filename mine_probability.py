@@ -0,0 +1,243 @@
+from functools import lru_cache
+from math import comb
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+import time
+from mine_sampling import sample_component, sampling_available
+
+# Exact mine probabilities for the cells the AI can't be sure about.
+#
+# Every knowledge sentence is a constraint: exactly mine_count of its cells
+# are mines.  Constraints that share cells are grouped into components, and
+# the mine assignments of each component that satisfy all of its constraints
+# are enumerated on their own, counting how many solutions use k mines and
+# how often each cell is a mine in them.  The components are then combined
+# with the number of mines left on the board: the cells outside of every
+# constraint take the mines the components don't use, in
+# comb(unconstrained cells, mines) ways.
+
+Cell = Tuple[int, int]
+Constraint = Tuple[FrozenSet[Cell], int]
+
+# components with more cells than this are not enumerated, since the number
+# of assignments grows exponentially with the size of the component.  They
+# are sampled instead if NumPy is installed, or roughly estimated if not.
+MAX_EXACT_CELLS = 30
+
+# seconds spent sampling the components too large to enumerate, in all
+SAMPLING_BUDGET = 0.005
+
+# Result of enumerating one component.  solutions[k] is the number of valid
+# assignments using k mines and cell_solutions[k][i] how many of those have a
+# mine on cells[i].
+class ComponentSolution():
+    def __init__(self,
+                 cells: Tuple[Cell, ...],
+                 solutions: Dict[int, int],
+                 cell_solutions: Dict[int, List[int]]) -> None:
+        self.cells = cells
+        self.solutions = solutions
+        self.cell_solutions = cell_solutions
+
+# Splits the constraints into groups that share no cells with each other.
+# Empty and duplicate constraints are dropped.
+def find_components(constraints: Iterable[Constraint]) -> List[FrozenSet[Constraint]]:
+    constraints = [constraint for constraint in set(constraints) if len(constraint[0]) > 0]
+
+    # union-find over the cells, joining all the cells of each constraint
+    parent: Dict[Cell, Cell] = {}
+
+    def find(cell: Cell) -> Cell:
+        parent.setdefault(cell, cell)
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for (cells, _) in constraints:
+        cells = iter(cells)
+        root = find(next(cells))
+        for cell in cells:
+            other = find(cell)
+            if other != root:
+                parent[other] = root
+
+    components: Dict[Cell, Set[Constraint]] = {}
+    for constraint in constraints:
+        root = find(next(iter(constraint[0])))
+        components.setdefault(root, set()).add(constraint)
+    return [frozenset(component) for component in components.values()]
+
+# Enumerates every assignment of mines to the cells of a component that
+# satisfies all of its constraints.  Results are memoised, since most of the
+# board is unchanged from one move to the next and so are most components.
+@lru_cache(maxsize=4096)
+def solve_component(component: FrozenSet[Constraint]) -> ComponentSolution:
+    constraints = list(component)
+    cells_of: Dict[Cell, List[int]] = {}
+    for index, (cells, _) in enumerate(constraints):
+        for cell in cells:
+            cells_of.setdefault(cell, []).append(index)
+
+    # order the cells so that each one shares a constraint with the ones
+    # before it, which lets bad assignments be cut off early
+    order: List[Cell] = []
+    seen: Set[Cell] = set()
+    for (cells, _) in constraints:
+        for cell in sorted(cells):
+            if cell not in seen:
+                seen.add(cell)
+                order.append(cell)
+    order.sort(key=lambda cell: min(cells_of[cell]))
+    cell_constraints = [cells_of[cell] for cell in order]
+
+    needed = [mine_count for (_, mine_count) in constraints]   # mines still to place
+    unassigned = [len(cells) for (cells, _) in constraints]    # cells not yet assigned
+    assignment = [0] * len(order)
+    solutions: Dict[int, int] = {}
+    cell_solutions: Dict[int, List[int]] = {}
+
+    def place(position: int, mines: int) -> None:
+        if position == len(order):
+            solutions[mines] = solutions.get(mines, 0) + 1
+            counts = cell_solutions.setdefault(mines, [0] * len(order))
+            for i in range(len(order)):
+                counts[i] += assignment[i]
+            return
+
+        indexes = cell_constraints[position]
+        for value in (0, 1):
+            valid = True
+            for index in indexes:
+                unassigned[index] -= 1
+                needed[index] -= value
+                if needed[index] < 0 or needed[index] > unassigned[index]:
+                    valid = False
+            if valid:
+                assignment[position] = value
+                place(position + 1, mines + value)
+            for index in indexes:
+                unassigned[index] += 1
+                needed[index] += value
+        assignment[position] = 0
+
+    place(0, 0)
+    return ComponentSolution(tuple(order), solutions, cell_solutions)
+
+# Rough probabilities for a component too large to enumerate when it can't be
+# sampled: each cell gets the highest share of mines of the constraints it is in.
+def estimate_component(component: FrozenSet[Constraint]) -> Dict[Cell, float]:
+    probabilities: Dict[Cell, float] = {}
+    for (cells, mine_count) in component:
+        share = mine_count / len(cells)
+        for cell in cells:
+            probabilities[cell] = max(probabilities.get(cell, 0.0), share)
+    return probabilities
+
+# the distinct cells of a component
+def _component_cells(component: FrozenSet[Constraint]) -> Set[Cell]:
+    cells: Set[Cell] = set()
+    for (constraint_cells, _) in component:
+        cells.update(constraint_cells)
+    return cells
+
+# multiplies two polynomials given as {power: coefficient}
+def _convolve(first: Dict[int, int], second: Dict[int, int]) -> Dict[int, int]:
+    result: Dict[int, int] = {}
+    for i, a in first.items():
+        for j, b in second.items():
+            result[i + j] = result.get(i + j, 0) + a * b
+    return result
+
+# Returns the probability that each unknown cell is a mine.  unknown_cells
+# are the cells not yet known to be safe or a mine, and mines_left the mines
+# among them.  If mines_left is None, every valid assignment of a component
+# counts the same and the cells outside of the constraints get the average
+# of the others.  Components too large to enumerate are sampled for up to
+# time_budget seconds in all, each taking an even share of what is left when
+# it starts.  Each one draws at least one batch, so a call can go over the
+# budget by about a batch per component.
+def mine_probabilities(constraints: Iterable[Constraint],
+                       unknown_cells: Set[Cell],
+                       mines_left: int = None,
+                       time_budget: float = SAMPLING_BUDGET) -> Dict[Cell, float]:
+    probabilities: Dict[Cell, float] = {}
+    solved: List[ComponentSolution] = []
+    large: List[FrozenSet[Constraint]] = []
+    for component in find_components(constraints):
+        if len(_component_cells(component)) > MAX_EXACT_CELLS:
+            large.append(component)
+        else:
+            solved.append(solve_component(component))
+
+    density = 0.5
+    if mines_left is not None and len(unknown_cells) > 0:
+        density = mines_left / len(unknown_cells)
+    deadline = time.perf_counter() + time_budget
+    for index, component in enumerate(large):
+        sampled = None
+        if sampling_available():
+            budget = max(deadline - time.perf_counter(), 0.0) / (len(large) - index)
+            sampled = sample_component(component, density, budget)
+        if sampled is not None:
+            probabilities.update(sampled.probabilities)
+        else:
+            probabilities.update(estimate_component(component))
+
+    constrained = set(probabilities)
+    for solution in solved:
+        constrained.update(solution.cells)
+    unconstrained = [cell for cell in unknown_cells if cell not in constrained]
+    free = len(unconstrained)
+
+    if mines_left is None:
+        for solution in solved:
+            total = sum(solution.solutions.values())
+            for i, cell in enumerate(solution.cells):
+                probabilities[cell] = sum(counts[i] for counts in solution.cell_solutions.values()) / total
+        average = sum(probabilities.values()) / len(probabilities) if len(probabilities) > 0 else 0.5
+        for cell in unconstrained:
+            probabilities[cell] = average
+        return probabilities
+
+    # the sampled and estimated components are worked out at the density of the whole board, so
+    # the mines they are expected to hold can leave too many or too few for the rest of it
+    low = sum(min(solution.solutions, default=0) for solution in solved)
+    high = sum(max(solution.solutions, default=0) for solution in solved) + free
+    mines_left = min(max(mines_left - round(sum(probabilities.values())), low), high)
+
+    # weight of a number of mines used by the components: the ways to place
+    # the rest of the mines on the unconstrained cells
+    def weight(mines: int) -> int:
+        rest = mines_left - mines
+        return comb(free, rest) if 0 <= rest <= free else 0
+
+    # prefix[i] and suffix[i] are the mine count polynomials of the
+    # components before and after i, so each component can be combined with
+    # all of the others without redoing the whole product
+    prefix = [{0: 1}]
+    for solution in solved:
+        prefix.append(_convolve(prefix[-1], solution.solutions))
+    suffix = [{0: 1}]
+    for solution in reversed(solved):
+        suffix.append(_convolve(suffix[-1], solution.solutions))
+    suffix.reverse()
+
+    everything = prefix[-1]
+    total = sum(ways * weight(mines) for mines, ways in everything.items())
+    if total == 0:
+        raise ValueError("Knowledge is not consistent with the number of mines left")
+
+    for index, solution in enumerate(solved):
+        others = _convolve(prefix[index], suffix[index + 1])
+        for mines, counts in solution.cell_solutions.items():
+            rest = sum(ways * weight(mines + other) for other, ways in others.items())
+            for i, cell in enumerate(solution.cells):
+                probabilities[cell] = probabilities.get(cell, 0) + counts[i] * rest
+        for cell in solution.cells:
+            probabilities[cell] = probabilities[cell] / total
+
+    if free > 0:
+        expected = sum(ways * weight(mines) * (mines_left - mines) for mines, ways in everything.items())
+        for cell in unconstrained:
+            probabilities[cell] = expected / (total * free)
+    return probabilities
@@ -0,0 +1,128 @@
+from typing import Dict, FrozenSet, Tuple
+import time
+
+# NumPy is only needed for sampling.  Without it, large components fall back
+# to the rough estimate in mine_probability.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Monte Carlo mine probabilities for components too large to enumerate.
+#
+# Candidate assignments for the cells of a component are drawn in batches as
+# a NumPy matrix, one row per candidate, and the rows that break a constraint
+# are thrown away.  Each cell is drawn with the share of mines of the
+# constraints it is in, which makes far more candidates valid than drawing
+# every cell the same way.  The valid ones are then weighted back to the
+# density of mines left on the board, so the result matches what exact
+# enumeration would give as the number of samples grows.
+
+Cell = Tuple[int, int]
+Constraint = Tuple[FrozenSet[Cell], int]
+
+# z-score of the confidence bounds (95%)
+CONFIDENCE_Z = 1.96
+
+# Per-cell probabilities from sampling.  lower and upper are the confidence
+# bounds of each probability and samples is the number of valid assignments
+# they come from, out of drawn candidates.
+class SampledProbabilities():
+    def __init__(self,
+                 probabilities: Dict[Cell, float],
+                 lower: Dict[Cell, float],
+                 upper: Dict[Cell, float],
+                 samples: int,
+                 drawn: int) -> None:
+        self.probabilities = probabilities
+        self.lower = lower
+        self.upper = upper
+        self.samples = samples
+        self.drawn = drawn
+
+# returns True if NumPy is installed and sample_component can be used
+def sampling_available() -> bool:
+    return np is not None
+
+# Estimates the chance of a mine on each cell of a component by drawing
+# batches of candidates until time_budget seconds have passed.  density is
+# the chance of a mine on a cell the constraints say nothing about.  Returns
+# None if no valid assignment was found in time.
+def sample_component(component: FrozenSet[Constraint],
+                     density: float,
+                     time_budget: float = 0.005,
+                     batch_size: int = 4096,
+                     seed: int = None) -> SampledProbabilities:
+    if np is None:
+        raise ImportError("NumPy is needed to sample mine probabilities")
+
+    constraints = list(component)
+    cells = sorted({cell for (constraint_cells, _) in constraints for cell in constraint_cells})
+    column = {cell: index for index, cell in enumerate(cells)}
+
+    # one row per constraint, one column per cell
+    matrix = np.zeros((len(constraints), len(cells)), dtype=np.int16)
+    counts = np.zeros(len(constraints), dtype=np.int16)
+    for row, (constraint_cells, mine_count) in enumerate(constraints):
+        matrix[row, [column[cell] for cell in constraint_cells]] = 1
+        counts[row] = mine_count
+
+    # draw each cell with the average share of mines of its constraints
+    shares = (counts / matrix.sum(axis=1)) @ matrix / matrix.sum(axis=0)
+    proposal = np.clip(shares, 0.02, 0.98)
+    density = min(max(density, 0.02), 0.98)
+
+    # log of the weight that turns a draw from the proposal into a draw at density
+    mine_weight = np.log(density) - np.log(proposal)
+    safe_weight = np.log(1 - density) - np.log(1 - proposal)
+
+    rng = np.random.default_rng(seed)
+    weight_sum = 0.0
+    weight_squares = 0.0
+    mine_sums = np.zeros(len(cells))
+    scale = 0.0
+    samples = 0
+    drawn = 0
+    deadline = time.perf_counter() + time_budget
+    while True:
+        candidates = rng.random((batch_size, len(cells))) < proposal
+        valid = candidates[((candidates.astype(np.int16) @ matrix.T) == counts).all(axis=1)]
+        drawn += batch_size
+
+        if len(valid) > 0:
+            log_weights = np.where(valid, mine_weight, safe_weight).sum(axis=1)
+
+            # keep the weights relative to the largest one seen so they don't overflow
+            top = log_weights.max()
+            if samples == 0:
+                scale = top
+            elif top > scale:
+                rescale = np.exp(scale - top)
+                weight_sum *= rescale
+                weight_squares *= rescale ** 2
+                mine_sums *= rescale
+                scale = top
+            weights = np.exp(log_weights - scale)
+
+            weight_sum += weights.sum()
+            weight_squares += (weights ** 2).sum()
+            mine_sums += weights @ valid
+            samples += len(valid)
+
+        if time.perf_counter() >= deadline:
+            break
+
+    if samples == 0:
+        return None
+
+    # rounding can take an estimate of 0 or 1 just past it, which the square root below can't take
+    estimate = np.clip(mine_sums / weight_sum, 0.0, 1.0)
+    effective_samples = weight_sum ** 2 / weight_squares
+    margin = CONFIDENCE_Z * np.sqrt(estimate * (1 - estimate) / effective_samples)
+    lower = np.clip(estimate - margin, 0.0, 1.0)
+    upper = np.clip(estimate + margin, 0.0, 1.0)
+    return SampledProbabilities({cell: float(estimate[i]) for i, cell in enumerate(cells)},
+                                {cell: float(lower[i]) for i, cell in enumerate(cells)},
+                                {cell: float(upper[i]) for i, cell in enumerate(cells)},
+                                samples,
+                                drawn)
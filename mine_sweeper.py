@@ -1,37 +1,166 @@
-from collections import deque
-from typing import Dict, List, Set, Tuple
+from array import array
+from collections.abc import ItemsView, Mapping, ValuesView
+from typing import Iterator, List, Sequence, Set, Tuple
 import random
 from game_status import GameStatus
 
+# Read-only map from the (row, col) of each cell in a MoveResult to what it
+# now shows.  It is a view over the flat indexes and codes of the result, so
+# no tuples are made until the cells are iterated, and values are picked
+# from a table by code: the text of each code for MoveResult.updates, or the
+# codes themselves for MoveResult.codes.
+class MoveUpdates(Mapping):
+    def __init__(self, indexes: array, codes: bytearray, width: int, values: Sequence) -> None:
+        self._indexes = indexes
+        self._codes = codes
+        self._width = width
+        self._values = values
+        self._positions = None
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        width = self._width
+        return (divmod(index, width) for index in self._indexes)
+
+    def __getitem__(self, cell: Tuple[int, int]):
+        # looking up a single cell needs a map from index to position, which
+        # is only built the first time
+        if self._positions is None:
+            self._positions = {index: k for k, index in enumerate(self._indexes)}
+        (i, j) = cell
+        if not 0 <= j < self._width:
+            raise KeyError(cell)
+        return self._values[self._codes[self._positions[i * self._width + j]]]
+
+    def items(self) -> ItemsView:
+        return _MoveUpdateItems(self)
+
+    def values(self) -> ValuesView:
+        return _MoveUpdateValues(self)
+
+# items and values of a MoveUpdates, read straight from its arrays
+class _MoveUpdateItems(ItemsView):
+    def __iter__(self):
+        updates = self._mapping
+        width, values = updates._width, updates._values
+        return ((divmod(index, width), values[code]) for index, code in zip(updates._indexes, updates._codes))
+
+class _MoveUpdateValues(ValuesView):
+    def __iter__(self):
+        values = self._mapping._values
+        return (values[code] for code in self._mapping._codes)
+
 # Represents the result of a move.  Status will tell if the the game is still
-# being played or over.  Updates are an update of what cells are now visible 
+# being played or over.  The cells that changed are kept as the flat indexes
+# (row * width + col) of the cells and, in cell_codes, a code for what each
+# one now shows: the number of mines around it, MINE, FLAG, or HIDDEN for a
+# cell whose flag was taken off.  updates shows them as a map from cell to text, the number
+# or one of Minesweeper.MINE, FLAG and HIDDEN, and codes as a map from cell
+# to code.
 class MoveResult():
+    MINE = 9
+    FLAG = 10
+    HIDDEN = 11
+
+    # text of each code, as shown by updates
+    TEXT = tuple(str(count) for count in range(9)) + ("MINE", "FLAG", "HIDDEN")
+
     def __init__(self, 
                  status: GameStatus, 
-                 cell_updates: Dict[Tuple[int, int], str]) -> None:
+                 indexes: array,
+                 codes: bytearray,
+                 width: int) -> None:
         self.status = status
-        self.updates = cell_updates
+        self.indexes = indexes
+        self.cell_codes = codes
+        self._width = width
+
+    # the views are only made when asked for, since most results are read once or not at all
+    @property
+    def codes(self) -> MoveUpdates:
+        return MoveUpdates(self.indexes, self.cell_codes, self._width, _CODES)
+
+    @property
+    def updates(self) -> MoveUpdates:
+        return MoveUpdates(self.indexes, self.cell_codes, self._width, MoveResult.TEXT)
+
+_CODES = range(len(MoveResult.TEXT))
+
+# Picks the flat indexes (row * width + col) of mine_count mines by sampling
+# without replacement, so the cost per mine stays the same however dense the
+# board is.  If safe_cell is given, that cell and its neighbors are left out
+# of the sample.
+def place_mines(height: int,
+                width: int,
+                mine_count: int,
+                rng: random.Random,
+                safe_cell: Tuple[int, int] = None) -> List[int]:
+    excluded = []
+    if safe_cell is not None:
+        for i in range(max(safe_cell[0] - 1, 0), min(safe_cell[0] + 2, height)):
+            for j in range(max(safe_cell[1] - 1, 0), min(safe_cell[1] + 2, width)):
+                excluded.append(i * width + j)
+
+    available = height * width - len(excluded)
+    if not 0 <= mine_count <= available:
+        raise ValueError("Mine count does not fit on the board")
+
+    # sample positions among the cells that are not excluded, then shift
+    # each position past the excluded cells that come before it
+    mines = rng.sample(range(available), mine_count)
+    if len(excluded) > 0:
+        for k in range(len(mines)):
+            index = mines[k]
+            for skipped in excluded:
+                if skipped <= index:
+                    index += 1
+                else:
+                    break
+            mines[k] = index
+    return mines
+
+# returns the indexes of the bytes that are 1
+def _set_indexes(plane: bytearray) -> List[int]:
+    indexes = []
+    index = plane.find(1)
+    while index >= 0:
+        indexes.append(index)
+        index = plane.find(1, index + 1)
+    return indexes
 
 # Core game logic for minesweeper
 class Minesweeper():
 
-    FLAG = "FLAG"
-    MINE = "MINE"
+    FLAG = MoveResult.TEXT[MoveResult.FLAG]
+    MINE = MoveResult.TEXT[MoveResult.MINE]
+    HIDDEN = MoveResult.TEXT[MoveResult.HIDDEN]
 
-    # for testing purposes, an intial board can be passed in
+    # for testing purposes, an intial board can be passed in.  Otherwise the
+    # mines are placed randomly using the given rng, or a new one created
+    # from seed.  If no seed is given one is picked and kept in self.seed so
+    # the board can be recreated.  If safe_cell is given, that cell and its
+    # neighbors are kept free of mines so it is safe as a first click.
     def __init__(self, 
                  height, 
                  width,
                  mine_count,
-                 initial_board: List[List[bool]] = None):
+                 initial_board: List[List[bool]] = None,
+                 seed: int = None,
+                 rng: random.Random = None,
+                 safe_cell: Tuple[int, int] = None):
 
         self._height = height
         self._width = width
         self._mine_count = mine_count
-        self._mine_locations = set()
         self._mines_flaged = set()
         self._game_status = GameStatus.ACTIVE
 
+        # if set, every reveal, flag and unflag is passed to its record
+        # method along with its result, see move_log.MoveRecorder
+        self.recorder = None
+
         # offsets to look at the surrounding cells
         self._surrounding_offsets = [       
                     (-1,-1),
@@ -43,80 +172,241 @@ class Minesweeper():
                     (1,0),
                     (1,1)]
 
+        # the board is stored flat, one byte per cell, indexed by
+        # row * width + col.  A 1 means the cell holds a mine.  It is the
+        # only record of the mines: a list of them is built from it with
+        # _set_indexes when one is needed.
+        self._board = bytearray(self._height * self._width)
+
         # create a new board
         if initial_board is None:
-
-            # set default build to False meaning no mines
-            self._board: List[List[bool]] = []
-            for _ in range(self._height):
-                row = []
-                for _ in range(self._width):
-                    row.append(False)
-                self._board.append(row)
-
-            # randomly place mines            
-            while len(self._mine_locations) < self._mine_count:
-                (i,j) = random.randrange(self._height), random.randrange(self._width)
-                if (i,j) not in self._mine_locations:
-                    self._board[i][j] = True
-                    self._mine_locations.add((i,j))
+            self._place_mines(seed, rng, safe_cell)
 
         else:
+            self.seed = None
+
             # validate input
             if (self._height != len(initial_board) or 
                 self._width != len(initial_board[0])):
                 raise ValueError("Height or width does not match input")
             
-            # get mintes
-            self._board = initial_board
+            # get mines
             for i in range(self._height):
                 for j in range(self._width):
-                    if self._board[i][j]:
-                          self._mine_locations.add((i,j))
+                    if initial_board[i][j]:
+                        self._board[i * self._width + j] = 1
 
             # validate mine count
-            if self._mine_count != len(self._mine_locations):
+            if self._mine_count != self._board.count(1):
                 raise ValueError("Incorrect mine count")
 
-    # Marks a mine in the game as flagged
+        # count of neighboring mines for every cell, computed once so that a
+        # reveal only needs a single lookup
+        self._nearby_counts = self._count_nearby_mines(bytearray(self._height * self._width))
+
+        # which cells have been revealed, one byte per cell like the board,
+        # and how many cells without a mine are still hidden.  The game is
+        # won once that reaches 0, or once exactly the mines are flagged,
+        # which is kept track of by counting the flags that are on mines.
+        self._revealed = bytearray(self._height * self._width)
+        self._unrevealed_safe_cells = self._height * self._width - self._mine_count
+        self._flags_on_mines = 0
+
+    # Creates a game from its state, such as one saved in a snapshot.  board,
+    # revealed and flags hold one byte per cell, indexed by row * width + col,
+    # that is 1 for a mine, a revealed cell and a flagged cell.
+    @classmethod
+    def from_state(cls,
+                   height: int,
+                   width: int,
+                   mine_count: int,
+                   board: bytes,
+                   revealed: bytes,
+                   flags: bytes,
+                   seed: int = None,
+                   status: GameStatus = GameStatus.ACTIVE) -> "Minesweeper":
+        if not len(board) == len(revealed) == len(flags) == height * width:
+            raise ValueError("Height or width does not match input")
+
+        # start from an empty board of the right size and fill it in
+        game = cls(height, width, 0, seed=0)
+        game.seed = seed
+        game._mine_count = mine_count
+        game._game_status = status
+        game._board[:] = board
+        game._revealed[:] = revealed
+        if mine_count != game._board.count(1):
+            raise ValueError("Incorrect mine count")
+
+        # a revealed cell can't be flagged, so a flag on one is dropped
+        flagged = [index for index in _set_indexes(bytearray(flags)) if not game._revealed[index]]
+        game._mines_flaged = {divmod(index, width) for index in flagged}
+        game._flags_on_mines = sum(game._board[index] for index in flagged)
+        game._unrevealed_safe_cells = height * width - mine_count - game._revealed.count(1)
+        game._count_nearby_mines(game._nearby_counts)
+        return game
+
+    # Starts a new game on this board, with the same size and number of
+    # mines.  The mines are placed like they are for a new game, from rng or
+    # seed, but the board and the other per cell arrays are cleared and
+    # filled in again rather than allocated, so restarting a large board
+    # only costs placing the mines.  The recorder is taken off, since its
+    # log is of the game that ended.
+    def reset(self,
+              seed: int = None,
+              rng: random.Random = None,
+              safe_cell: Tuple[int, int] = None) -> None:
+        cells = self._height * self._width
+        zeros = bytes(cells)
+        self._board[:] = zeros
+        self._revealed[:] = zeros
+        self._nearby_counts[:] = zeros
+        self._mines_flaged.clear()
+        self.recorder = None
+
+        self._place_mines(seed, rng, safe_cell)
+        self._count_nearby_mines(self._nearby_counts)
+        self._game_status = GameStatus.ACTIVE
+        self._unrevealed_safe_cells = cells - self._mine_count
+        self._flags_on_mines = 0
+
+    # randomly places the mines on an empty board, using rng or a new one
+    # created from seed, and keeps the seed
+    def _place_mines(self, seed: int, rng: random.Random, safe_cell: Tuple[int, int]) -> None:
+        if rng is None:
+            if seed is None:
+                seed = random.getrandbits(64)
+            rng = random.Random(seed)
+        self.seed = seed
+
+        for index in place_mines(self._height, self._width, self._mine_count, rng, safe_cell):
+            self._board[index] = 1
+
+    # Returns the board, revealed and flags bytes of the game as given to
+    # from_state.  They are copies, so they can be kept as the game goes on.
+    def get_state(self) -> Tuple[bytes, bytes, bytes]:
+        flags = bytearray(self._height * self._width)
+        for (i, j) in self._mines_flaged:
+            flags[i * self._width + j] = 1
+        return bytes(self._board), bytes(self._revealed), bytes(flags)
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def mine_count(self) -> int:
+        return self._mine_count
+
+    @property
+    def status(self) -> GameStatus:
+        return self._game_status
+
+    # returns True if the cell has been revealed
+    def is_revealed(self, cell: Tuple[int, int]) -> bool:
+        return self._revealed[cell[0] * self._width + cell[1]] == 1
+
+    # Marks a mine in the game as flagged.  Revealed cells can't be flagged
+    # and flagging a cell twice changes nothing, so neither has updates.
     def flag_possible_mine(self, cell: Tuple[int, int]) -> MoveResult:
+        result = self._flag_possible_mine(cell)
+        if self.recorder is not None:
+            self.recorder.record("flag", cell, result)
+        return result
+
+    def _flag_possible_mine(self, cell: Tuple[int, int]) -> MoveResult:
+        index = cell[0] * self._width + cell[1]
+        if self._revealed[index] or cell in self._mines_flaged:
+            return self._move_result()
+
         self._mines_flaged.add(cell)
-        if self._mines_flaged == self._mine_locations:
+        self._flags_on_mines += self._board[index]
+        self._update_won()
+        return self._move_result(array('i', [index]), bytearray([MoveResult.FLAG]))
+
+    # Takes the flag off of a cell, which shows it as hidden again.  Cells
+    # without a flag, which includes every revealed cell, have no updates.
+    def unflag_possible_mine(self, cell: Tuple[int, int]) -> MoveResult:
+        result = self._unflag_possible_mine(cell)
+        if self.recorder is not None:
+            self.recorder.record("unflag", cell, result)
+        return result
+
+    def _unflag_possible_mine(self, cell: Tuple[int, int]) -> MoveResult:
+        index = cell[0] * self._width + cell[1]
+        if self._revealed[index] or cell not in self._mines_flaged:
+            return self._move_result()
+
+        self._mines_flaged.remove(cell)
+        self._flags_on_mines -= self._board[index]
+        self._update_won()
+        return self._move_result(array('i', [index]), bytearray([MoveResult.HIDDEN]))
+
+    # a MoveResult with the current status of the game and the given changes
+    def _move_result(self, indexes: array = None, codes: bytearray = None) -> MoveResult:
+        if indexes is None:
+            (indexes, codes) = (array('i'), bytearray())
+        return MoveResult(self._game_status, indexes, codes, self._width)
+
+    # the game is won once every safe cell is revealed or exactly the mines are flagged
+    def _update_won(self) -> None:
+        if self._game_status == GameStatus.ACTIVE and (
+                self._unrevealed_safe_cells == 0 or
+                (self._flags_on_mines == self._mine_count and 
+                 len(self._mines_flaged) == self._mine_count)):
             self._game_status = GameStatus.WON
-        return MoveResult(self._game_status, {cell: Minesweeper.FLAG})
-        
 
     # Reveals a cell in Minesweeper.  Will return a MoveResult showing
     # status of the game as well all of the updates to known information. If 
-    # we uncover a place with 0 nearby mines, we will open up all blank cells
+    # we uncover a place with 0 nearby mines, we will open up all blank cells.
+    # Cells that are already revealed are left out of the updates, so
+    # revealing one again has none.
     def reveal_cell(self, cell: Tuple[int, int]) -> MoveResult: 
-        updates = {}
-
-        # if we hit a mine, we lost
-        if cell in self._mine_locations:
-            for mine in self._mine_locations:
-                    updates[mine] = Minesweeper.MINE
-            return MoveResult(GameStatus.LOST, updates)
-        
-        # if there are no mines nearby, add all empty cells that are next to 
-        # the empty cell to a queue and go until we have no neighbor cells that
-        # have 0 neighboring mines. 
-        items_explored = set()
-        queue = deque()
-        queue.append(cell)
-        while len(queue) > 0:
-            item = queue.popleft()
-            items_explored.add(item)
-            nearby = self._get_nearyby_mine_count(item)
-            updates[item] = str(nearby)
-            if nearby == 0:
-                neighbors = self._get_neighboring_cells(item)
-                for neighbor in neighbors:
-                    if neighbor not in items_explored:
-                        queue.append(neighbor)
-
-
-        return MoveResult(GameStatus.WON if len(self._mines_flaged) == self._mine_count else GameStatus.ACTIVE, updates)
+        result = self._reveal_cell(cell)
+        if self.recorder is not None:
+            self.recorder.record("reveal", cell, result)
+        return result
+
+    def _reveal_cell(self, cell: Tuple[int, int]) -> MoveResult:
+        # if we hit a mine, we lost, and every mine is shown in index order
+        index = cell[0] * self._width + cell[1]
+        if self._board[index]:
+            self._game_status = GameStatus.LOST
+            indexes = array('i', _set_indexes(self._board))
+            return self._move_result(indexes, bytearray([MoveResult.MINE]) * len(indexes))
+
+        revealed = self._revealed
+        counts = self._nearby_counts
+        if revealed[index]:
+            return self._move_result()
+
+        # a cell with mines nearby only reveals itself.  A cell with no mines
+        # nearby opens the whole zero region it belongs to, along with the
+        # numbered cells on its border.
+        if counts[index] != 0:
+            revealed[index] = 1
+            indexes = array('i', (index,))
+            codes = bytearray((counts[index],))
+            self._mines_flaged.discard(cell)
+        else:
+            indexes = self._reveal_zero_region(index)
+            codes = bytearray([counts[item] for item in indexes])
+
+            # a region can take in cells that were flagged.  Their flags come
+            # off, and since they aren't mines, the flags on mines stay the same.
+            if len(self._mines_flaged) > 0:
+                width = self._width
+                self._mines_flaged.difference_update(
+                    [flag for flag in self._mines_flaged if revealed[flag[0] * width + flag[1]]])
+
+        self._unrevealed_safe_cells -= len(indexes)
+        if self._unrevealed_safe_cells == 0:
+            self._update_won()
+        return MoveResult(self._game_status, indexes, codes, self._width)
 
     # returns the neighboring cells of a given cell
     def _get_neighboring_cells(self, cell: Tuple[int, int]) -> Set[Tuple[int, int]]:
@@ -128,13 +418,80 @@ class Minesweeper():
                 cells.add((i,j))
         return cells
 
+    # returns the flat indexes of the cells surrounding a flat index
+    def _get_neighboring_indexes(self, index: int) -> List[int]:
+        (i, j) = divmod(index, self._width)
+        indexes = []
+        for offset in self._surrounding_offsets:
+            (r,c) = i + offset[0], j + offset[1]
+            if (0 <= r < self._height and
+                    0 <= c < self._width):
+                indexes.append(r * self._width + c)
+        return indexes
+
+    # reveals the zero region containing the given hidden zero cell, along
+    # with the numbered cells on its border, and returns the flat indexes of
+    # the cells it revealed.  The region is found with a flood fill that
+    # marks cells revealed as they are queued, so no cell is queued twice.
+    # Since revealing any zero cell reveals its whole region, a region is
+    # only ever walked once.
+    def _reveal_zero_region(self, index: int) -> array:
+        width = self._width
+        counts = self._nearby_counts
+        revealed = self._revealed
+        last_row, last_col = self._height - 1, width - 1
+        deltas = [offset[0] * width + offset[1] for offset in self._surrounding_offsets]
+        region = array('i')
+        border = set()
+        revealed[index] = 1
+        stack = [index]
+        while len(stack) > 0:
+            item = stack.pop()
+            region.append(item)
+
+            # cells away from the edges don't need bounds checks
+            (i, j) = divmod(item, width)
+            if 0 < i < last_row and 0 < j < last_col:
+                neighbors = [item + delta for delta in deltas]
+            else:
+                neighbors = self._get_neighboring_indexes(item)
+
+            for neighbor in neighbors:
+                if counts[neighbor] != 0:
+                    border.add(neighbor)
+                elif not revealed[neighbor]:
+                    revealed[neighbor] = 1
+                    stack.append(neighbor)
+
+        # numbered cells revealed by earlier moves are left out
+        for item in border:
+            if not revealed[item]:
+                revealed[item] = 1
+                region.append(item)
+        return region
+
     # returns the count of mines in the neighboring cells.
     def _get_nearyby_mine_count(self, cell: Tuple[int, int]) -> int:
-        mine_count = 0
-        for offset in self._surrounding_offsets:
-            (i,j) = cell[0] + offset[0], cell[1] + offset[1]
-            if (0 <= i < self._height and
-                    0 <= j < self._width and
-                    self._board[i][j]):
-                mine_count += 1
-        return mine_count
\ No newline at end of file
+        return self._nearby_counts[cell[0] * self._width + cell[1]]
+
+    # fills counts, one zeroed byte per cell, with the flat grid of
+    # neighboring mine counts.  Rather than looking at the 8 neighbors of
+    # every cell, each mine adds one to its neighbors, so the cost is
+    # proportional to the number of mines.
+    def _count_nearby_mines(self, counts: bytearray) -> bytearray:
+        width = self._width
+        last_row, last_col = self._height - 1, width - 1
+        deltas = [offset[0] * width + offset[1] for offset in self._surrounding_offsets]
+        board = self._board
+        index = board.find(1)
+        while index >= 0:
+            # mines away from the edges don't need bounds checks
+            (i, j) = divmod(index, width)
+            if 0 < i < last_row and 0 < j < last_col:
+                for delta in deltas:
+                    counts[index + delta] += 1
+            else:
+                for neighbor in self._get_neighboring_indexes(index):
+                    counts[neighbor] += 1
+            index = board.find(1, index + 1)
+        return counts
@@ -1,52 +1,227 @@
-from typing import List, Set, Tuple
+from collections import deque
+from itertools import count
+from typing import Callable, Dict, List, Mapping, Set, Tuple
+import heapq
+from mine_probability import mine_probabilities
+from pattern_cache import MINE, OUTSIDE, RADIUS, SAFE, SIZE, UNKNOWN, PatternCache
+
+# the knowledge base is compacted once it holds more than this many sentences and at least
+# half of them are empty
+COMPACTION_THRESHOLD = 256
+
+# codes of the cells in the outer ring of a window, where numbers are only known to be safe
+_RING_CODES = bytes(SAFE if code <= 8 else code for code in range(256))
 
 # The KnowledgeSentence class represents knowledge that is aquired while 
 # playing the game. Knowledge is represented by a set of tuples representing
 # the cells and the count of mines in that set. For example, cells 
 # {(1,2), (1,3)} and a count of 1 means that either (1,2) or (1,3) is a mine.
+#
+# The cells are stored as a bitmask over flat cell ids (row * width + col).
+# Bit k of mask is the cell with id offset + k, and offset is always the id of
+# the lowest cell so the mask stays as small as the area the sentence covers.
+# Subset tests, differences and equality are then integer operations.  If the
+# board width is not given, the widest column of the cells is used, so two
+# sentences can have different widths.  Those are compared by their cells.
 class KnowledgeSentence():
 
-    def __init__(self, cells:Set[Tuple[int, int]], mine_count: int) -> None:
-        self.cells: Set = set(cells)
+    __slots__ = ("width", "offset", "mask", "mine_count")
+
+    def __init__(self, cells:Set[Tuple[int, int]], mine_count: int, width: int = None) -> None:
+        if width is None:
+            width = max((j for (_, j) in cells), default=0) + 1
+        self.width: int = width
+        self.offset: int = 0
+        self.mask: int = 0
         self.mine_count:int = mine_count
-        self.known_mine_cells: Set[Tuple[int, int]] = set()
-        self.known_safe_cells: Set[Tuple[int, int]] = set()
+
+        ids = [i * width + j for (i, j) in cells]
+        if len(ids) > 0:
+            self.offset = min(ids)
+            for cell_id in ids:
+                self.mask |= 1 << (cell_id - self.offset)
+
+    # creates a sentence straight from its bitmask
+    @classmethod
+    def _from_mask(cls, width: int, offset: int, mask: int, mine_count: int) -> "KnowledgeSentence":
+        sentence = cls.__new__(cls)
+        sentence.width = width
+        sentence.offset = offset
+        sentence.mask = mask
+        sentence.mine_count = mine_count
+        sentence._normalize()
+        return sentence
+
+    # creates a sentence from the flat ids of its cells, in increasing order
+    @classmethod
+    def _from_ids(cls, width: int, ids: List[int], mine_count: int) -> "KnowledgeSentence":
+        sentence = cls.__new__(cls)
+        sentence.width = width
+        sentence.mine_count = mine_count
+        sentence.offset = ids[0] if len(ids) > 0 else 0
+        sentence.mask = 0
+        for cell_id in ids:
+            sentence.mask |= 1 << (cell_id - sentence.offset)
+        return sentence
+
+    # moves offset up to the lowest cell so that equal sentences have equal masks
+    def _normalize(self) -> None:
+        if self.mask == 0:
+            self.offset = 0
+        else:
+            shift = (self.mask & -self.mask).bit_length() - 1
+            self.mask >>= shift
+            self.offset += shift
+
+    # the flat ids (row * width + col) of the cells in this sentence
+    def cell_ids(self) -> List[int]:
+        ids = []
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            ids.append(self.offset + low.bit_length() - 1)
+            mask ^= low
+        return ids
+
+    # the set of cells in this sentence
+    @property
+    def cells(self) -> Set[Tuple[int, int]]:
+        return {divmod(cell_id, self.width) for cell_id in self.cell_ids()}
+
+    def __len__(self) -> int:
+        return self.mask.bit_count()
 
     def __eq__(self, other: "KnowledgeSentence"):
-        return self.cells == other.cells and self.mine_count == other.mine_count
+        if self.width != other.width:
+            return self.mine_count == other.mine_count and self.cells == other.cells
+        return (self.mask == other.mask and 
+                self.offset == other.offset and 
+                self.mine_count == other.mine_count)
+
+    # hashed by the cells rather than the mask, so equal sentences of different widths hash the same
+    def __hash__(self) -> int:
+        return hash((frozenset(self.cells), self.mine_count))
+
+    # returns the bit of the cell in mask, or -1 if it can't be in this sentence
+    def _bit(self, cell: Tuple[int, int]) -> int:
+        if not 0 <= cell[1] < self.width:
+            return -1
+        bit = cell[0] * self.width + cell[1] - self.offset
+        return bit if bit >= 0 and (self.mask >> bit) & 1 else -1
+
+    # returns True if every cell of this sentence is also in other
+    def issubset(self, other: "KnowledgeSentence") -> bool:
+        if self.mask == 0:
+            return True
+        if self.width != other.width:
+            return self.cells <= other.cells
+        shift = self.offset - other.offset
+        if shift < 0:
+            return False
+        shifted = self.mask << shift
+        return shifted & other.mask == shifted
+
+    # returns a new sentence with the cells of this sentence that are not in other, and the
+    # mines of this sentence that are not in other.  Only makes sense if other is a subset.
+    def difference(self, other: "KnowledgeSentence") -> "KnowledgeSentence":
+        if self.width != other.width:
+            return KnowledgeSentence(self.cells - other.cells, self.mine_count - other.mine_count, self.width)
+        shift = other.offset - self.offset
+        other_mask = other.mask << shift if shift >= 0 else other.mask >> -shift
+        return KnowledgeSentence._from_mask(self.width, 
+                                            self.offset, 
+                                            self.mask & ~other_mask, 
+                                            self.mine_count - other.mine_count)
+
+    # takes out a cell that is known to be in this sentence, given by its flat id.  Only taking
+    # out the lowest cell moves the offset.
+    def _remove(self, cell_id: int) -> None:
+        bit = cell_id - self.offset
+        self.mask ^= 1 << bit
+        if bit == 0:
+            self._normalize()
 
-    # TODO: Implement "mark_mine"
-    # **********************************
     # Updates this knowledge sentence with the fact that the given cell is a mine. If the cell is in 
     # this knowledge set, mark it as a mine and decrease mine_count by 1 
     # cell: Coordinates of the cell that should be marked as a mine
     def mark_mine(self, cell: Tuple[int, int]):
-        raise NotImplementedError
+        bit = self._bit(cell)
+        if bit >= 0:
+            self.mask ^= 1 << bit
+            self.mine_count -= 1
+            self._normalize()
 
-    # TODO: Implement "mark_safe"
-    # **********************************
     # Updates this knowledge sentence with the fact that the cell is safe and not a mine.
     # If the cell is in this knowledge set, mark it as safe 
     # cell: Coordinates of the cell that should be marked as a mine
     def mark_safe(self, cell: Tuple[int, int]):
-        raise NotImplementedError
+        bit = self._bit(cell)
+        if bit >= 0:
+            self.mask ^= 1 << bit
+            self._normalize()
 
 # Main AI that adds knowledge to the knowledge base as well as tries to find
 # any new knowledge that can be found
 class MinesweeperAI():
 
-    def __init__(self, height: int, width: int)-> None:
+    # mine_count is the number of mines on the board.  It is optional, but without it the
+    # chance of a mine away from the known numbers can only be guessed.  If a pattern_cache is
+    # given, the patterns around the revealed cells are looked up in it whenever the sentences
+    # run out of safe moves, which finds what some shapes imply that the sentences can't.  Only
+    # the windows with a cell that changed since the last lookup are looked up again.  The cache
+    # can be shared between games.
+    # move_policy picks the order of the safe moves: it is called with the AI and a cell when
+    # the cell is found to be safe, and cells with lower values are played first.  Without
+    # one, safe moves are played in the order they were found.  See prefer_likely_zero and
+    # prefer_most_constrained.
+    def __init__(self, 
+                 height: int, 
+                 width: int, 
+                 mine_count: int = None,
+                 pattern_cache: PatternCache = None,
+                 move_policy: Callable[["MinesweeperAI", Tuple[int, int]], float] = None)-> None:
         #dimensions of the board
         self.height:int = height 
         self.width:int = width
+        self.mine_count:int = mine_count
+        self.pattern_cache = pattern_cache
+        self.move_policy = move_policy
+
+        # safe cells that have not been clicked yet, in the order they will be played.  A deque
+        # without a move policy, otherwise a heap of (priority, order found, cell).  Cells that
+        # get clicked some other way are dropped when they reach the front.
+        self._safe_moves = deque() if move_policy is None else []
+        self._safe_move_order = count()
+
+        # With a pattern cache, the pattern code of every cell, as a number if it was revealed,
+        # in a board with RADIUS cells of OUTSIDE around it, so a window is SIZE slices of it.
+        # Cells are at (row + RADIUS) * (width + 2 * RADIUS) + col + RADIUS.
+        self._pattern_width = width + 2 * RADIUS
+        self._pattern_board = self._new_pattern_board() if pattern_cache is not None else None
+
+        # indexes in the pattern board of the cells that changed since the patterns were last looked up
+        self._pattern_changes: Set[int] = set()
 
         self.known_mine_cells:Set[Tuple[int,int]] = set() # set of cells that are mines
         self.known_safe_cells:Set[Tuple[int,int]] = set() # set of cells that are safe
         self.moves_made:Set[Tuple[int,int]] = set() # set of cells that have been clicked
 
-        # List of sentences about the game known to be true
+        # List of sentences about the game known to be true.  Sentences that become empty or
+        # equal to another one stay in it until it is compacted.
         self.knowledge_base: List[KnowledgeSentence] = []
 
+        # number of sentences in the knowledge base that are not empty, now and at most
+        self.sentence_count: int = 0
+        self.peak_sentence_count: int = 0
+
+        # index from the flat id (row * width + col) of each cell to the sentences that contain
+        # it, so marking a cell only touches those sentences.  Sentences are keyed by id() since
+        # equal sentences can both be in the knowledge base.
+        self._sentences_by_cell: Dict[int, Dict[int, KnowledgeSentence]] = {}
+
+        # sentences that were added or changed and still need to be checked for new knowledge
+        self._pending: deque = deque()
+
         # create a set of all possible cells
         self.all_cells = set()
         for i in range(self.height):
@@ -89,109 +264,432 @@ class MinesweeperAI():
 
         return (cells, mine_count)
     
-    # mark_mine (do not modify)
+    # _neighbor_sentence
+    # **************************
+    # Same as _calculate_neighbor_cells_and_count, but returns the sentence of the cells around
+    # the given cell that are not known yet, along with their flat ids in increasing order
+    def _neighbor_sentence(self, cell: Tuple[int, int], mine_count: int) -> Tuple[KnowledgeSentence, List[int]]:
+        (i, j) = cell
+        width = self.width
+        ids = []
+        for (di, dj) in self.surrounding_offsets:
+            (r, c) = (i + di, j + dj)
+            if 0 <= r < self.height and 0 <= c < width:
+                neighbor = (r, c)
+                if neighbor in self.known_safe_cells:
+                    continue
+                if neighbor in self.known_mine_cells:
+                    mine_count -= 1
+                else:
+                    ids.append(r * width + c)
+        return (KnowledgeSentence._from_ids(width, ids, mine_count), ids)
+
+    # _add_sentence
+    # **************************
+    # Adds a sentence to the knowledge base, indexes it by each of its cells and queues it
+    # to be checked for new knowledge.  The flat ids of its cells can be given if they are
+    # already known, to save working them out from the mask.
+    def _add_sentence(self, sentence: KnowledgeSentence, cell_ids: List[int] = None) -> None:
+        self.knowledge_base.append(sentence)
+        by_cell = self._sentences_by_cell
+        key = id(sentence)
+        for cell_id in sentence.cell_ids() if cell_ids is None else cell_ids:
+            sentences = by_cell.get(cell_id)
+            if sentences is None:
+                by_cell[cell_id] = {key: sentence}
+            else:
+                sentences[key] = sentence
+        self._pending.append(sentence)
+        if sentence.mask != 0:
+            self.sentence_count += 1
+            self.peak_sentence_count = max(self.peak_sentence_count, self.sentence_count)
+
+    # _drop_sentence
+    # **************************
+    # Empties a sentence that another one in the knowledge base already says the same as, and
+    # takes it out of the index.  It is removed from the knowledge base when that is compacted.
+    def _drop_sentence(self, sentence: KnowledgeSentence) -> None:
+        for cell_id in sentence.cell_ids():
+            self._sentences_by_cell[cell_id].pop(id(sentence))
+        sentence.mask = 0
+        sentence.offset = 0
+        sentence.mine_count = 0
+        self.sentence_count -= 1
+
+    # _has_sentence
+    # **************************
+    # Returns True if another sentence equal to the given one is already in the knowledge base.
+    # Only the sentences sharing its lowest cell, the one at its offset, need to be looked at.
+    def _has_sentence(self, sentence: KnowledgeSentence) -> bool:
+        others = self._sentences_by_cell.get(sentence.offset)
+        if others is None or (len(others) == 1 and id(sentence) in others):
+            return False
+        return any(other is not sentence and other == sentence for other in others.values())
+
+    # compact
+    # **************************
+    # Removes the empty sentences from the knowledge base: those whose cells are all known to be
+    # mines or safe, and those that were dropped for being equal to another sentence.  This is
+    # done on its own once enough of the knowledge base is empty, see COMPACTION_THRESHOLD.
+    def compact(self) -> None:
+        self.knowledge_base = [sentence for sentence in self.knowledge_base if len(sentence) > 0]
+
+    # _overlapping_sentences
+    # **************************
+    # Returns the other sentences that share at least one cell with the given sentence
+    def _overlapping_sentences(self, sentence: KnowledgeSentence) -> List[KnowledgeSentence]:
+        overlapping = {}
+        for cell_id in sentence.cell_ids():
+            overlapping.update(self._sentences_by_cell.get(cell_id, {}))
+        overlapping.pop(id(sentence), None)
+        return list(overlapping.values())
+
+    # mark_mine
     # **************************
     # Adds the given cell to the set of known mines and marks it as a mine on all knowledge
-    # sentences in the game.
+    # sentences that contain it.  Once marked the cell is in none of them, so it leaves the index.
+    # The changed sentences are queued to be checked again.
     def mark_mine(self, cell: Tuple[int, int])-> None:
+        if self.pattern_cache is not None and cell not in self.known_mine_cells:
+            self._set_pattern_code(cell, MINE)
         self.known_mine_cells.add(cell)
-        for sentence in self.knowledge_base:
-            sentence.mark_mine(cell)
+        cell_id = cell[0] * self.width + cell[1]
+        sentences = self._sentences_by_cell.pop(cell_id, None)
+        if sentences is not None:
+            for sentence in sentences.values():
+                sentence._remove(cell_id)
+                sentence.mine_count -= 1
+                self._pending.append(sentence)
+                if sentence.mask == 0:
+                    self.sentence_count -= 1
 
-    # mark_safe (do not modify)
+    # mark_safe
     # **************************
-    # Adds the given cell to the set of known safe cells and marks it as safe on all knowledge
-    # sentences in the game.
+    # Adds the given cell to the set of known safe cells and the safe moves, and marks it as safe
+    # on all knowledge sentences that contain it.  Once marked the cell is in none of them, so it leaves the index.
+    # The changed sentences are queued to be checked again.
     def mark_safe(self, cell: Tuple[int, int])-> None:
+        if cell not in self.known_safe_cells:
+            if cell not in self.moves_made:
+                self._add_safe_move(cell)
+            if self.pattern_cache is not None:
+                self._set_pattern_code(cell, SAFE)
         self.known_safe_cells.add(cell)
-        for sentence in self.knowledge_base:
-            sentence.mark_safe(cell)
+        cell_id = cell[0] * self.width + cell[1]
+        sentences = self._sentences_by_cell.pop(cell_id, None)
+        if sentences is not None:
+            for sentence in sentences.values():
+                sentence._remove(cell_id)
+                self._pending.append(sentence)
+                if sentence.mask == 0:
+                    self.sentence_count -= 1
 
-    # TODO: Implement add_knowledge
+    # restore_knowledge
+    # **********************************
+    # Puts back knowledge saved from another MinesweeperAI of the same size, such as from a snapshot.
+    # sentences are the (offset, mask, mine_count) of KnowledgeSentence objects and revealed_counts
+    # the numbers of the revealed cells, which are only needed with a pattern cache.  Meant for a new
+    # AI; the knowledge is taken as it is, without inferring anything from it.
+    def restore_knowledge(self,
+                          known_mine_cells: Set[Tuple[int, int]],
+                          known_safe_cells: Set[Tuple[int, int]],
+                          moves_made: Set[Tuple[int, int]],
+                          sentences: List[Tuple[int, int, int]],
+                          revealed_counts: Dict[Tuple[int, int], int] = None) -> None:
+        self.known_mine_cells = set(known_mine_cells)
+        self.known_safe_cells = set(known_safe_cells)
+        self.moves_made = set(moves_made)
+        for cell in sorted(self.known_safe_cells - self.moves_made):
+            self._add_safe_move(cell)
+        for (offset, mask, mine_count) in sentences:
+            self._add_sentence(KnowledgeSentence._from_mask(self.width, offset, mask, mine_count))
+        self._pending.clear()
+        if self.pattern_cache is not None:
+            for cell in self.known_safe_cells:
+                self._set_pattern_code(cell, SAFE)
+            for cell in self.known_mine_cells:
+                self._set_pattern_code(cell, MINE)
+            for cell, mine_count in (revealed_counts or {}).items():
+                self._set_pattern_code(cell, mine_count)
+
+    # reset
+    # **********************************
+    # Forgets everything about the game so far, for a new game on a board of the same size.  The
+    # sets and lists are emptied rather than made again, and all_cells, which takes a while to
+    # build on a large board, is kept.  The pattern cache is kept too, since it can be shared
+    # between games.
+    def reset(self, mine_count: int = None) -> None:
+        self.mine_count = mine_count
+        self._safe_moves.clear()
+        self._safe_move_order = count()
+        if self.pattern_cache is not None:
+            self._pattern_board = self._new_pattern_board()
+        self._pattern_changes.clear()
+        self.known_mine_cells.clear()
+        self.known_safe_cells.clear()
+        self.moves_made.clear()
+        self.knowledge_base.clear()
+        self.sentence_count = 0
+        self.peak_sentence_count = 0
+        self._sentences_by_cell.clear()
+        self._pending.clear()
+
+    # add_knowledge
     # ********************************** 
     # Called everytime a cell is revealed to be safe. The game will pass in
     # a tuple for the safe cell and how many mines are around it. This method will update the
     # appropriate instance variables for this object and creates a new knowledge sentence to 
     # reflect what we know about the cells surrounding the safe cell. It then infers new 
-    # knowledge (i.e. updates all knowledge sentences to not include the safe cell) by 
-    # marking the cell as safe and iterating through all knowledge sentences to check if we know
-    # of any new mines or safe cells. It will then find the difference between knowledge 
-    # sentences that are subsets of other sentences to build new sentences until there are no more
-    # changes.
+    # knowledge by checking the new sentence, and every sentence that changes because of it,
+    # for new mines or safe cells and against the sentences it shares cells with.
     def add_knowledge(self, safe_cell: Tuple[int, int], mine_count: int)-> None:
-        # 1) Mark the incoming cell as safe
+        # 1) Add the cell to the set of moves that have been made
+        self.moves_made.add(safe_cell)
+
+        # 2) Mark the incoming cell as safe
         self.mark_safe(safe_cell)
 
-        # 2) Add the cell to the set of moves that have been made
-        self.moves_made.add(safe_cell)
+        # 3) Add new knowledge to our knowledge base
+        self._add_sentence(*self._neighbor_sentence(safe_cell, mine_count))
+
+        # 4) Keep the number for the patterns, which are looked up once there is no safe move
+        if self.pattern_cache is not None:
+            self._set_pattern_code(safe_cell, mine_count)
+
+        # 5) Infer new knowledge, now that we have included our new sentence in our knowledge base
+        self._infer_knowledge()
+
+    # add_knowledge_many
+    # **********************************
+    # Same as calling add_knowledge for every cell of a reveal, such as the codes of a MoveResult,
+    # but inference only runs once at the end.  All of the cells are marked safe first, then a
+    # sentence is added for each one, so the knowledge ends up the same as adding them one by one.
+    # updates: map from each revealed cell to the number of mines around it, such as MoveResult.codes.
+    # The numbers can also be strings, as in MoveResult.updates.  They are all converted before
+    # anything is changed, so a number that isn't one leaves the AI as it was.
+    def add_knowledge_many(self, updates: Mapping[Tuple[int, int], int])-> None:
+        # 1) Convert the numbers, which raises ValueError on a bad one
+        counts = [(safe_cell, int(mine_count)) for safe_cell, mine_count in updates.items()]
+
+        # 2) Add the incoming cells to the moves that have been made and mark them as safe
+        for safe_cell, _ in counts:
+            self.moves_made.add(safe_cell)
+            self.mark_safe(safe_cell)
 
         # 3) Add new knowledge to our knowledge base
-        # a) Use _calculate_neighbor_cells_and_count to get a set of cells and create a new KnowledgeSentence object
-        neighbor_cells, count = self._calculate_neighbor_cells_and_count(safe_cell, len(self.known
-        knowledge_sentence = KnowledgeSentence(neighbor_cells, count)
-
-        # b) Add the knowledge sentence to self.knowledge_base
-        self.knowledge_base.append(knowledge_sentence)
-
-        # 4) Infer new knowledge, now that we have included our new sentence in our knowledge base
-        # We need to do this repeatedly until no knew knowledge is created
-        changes = True # flag to indicate when we infer new knowledge
-        while (changes):
-            changes = False
-
-            # for each knowledge sentence:
-
-                # a) if the mine count equals the number of cells, mark all of those cells as a known mine
-                # and set the changes flag to True
-                # NOTE: you will need to create a copy of the set of cells in the knowledge sentence to iterate 
-                # through, since marking mine cells will remove those cells from that set. 
-                # NOTE: Equality for knowledge senteces are based on cells in it, so empty sentences can cause 
-                # inifinte loops if you are not careful
-                if mine_count == len(self.all_cells):
-                    for cell in neighbor_cells:
-                        self.known_mine_cells.add(cell)
-                        changes = True
-
-                # b) if the count is 0, mark all of those mines as safe and set the changes flag to True
-                # NOTE: you will need to create a copy of the set of cells in the knowledge sentence to iterate 
-                # through, since marking safe cells will remove those cells from that set.
-                # NOTE: Equality for knowledge senteces are based on cells in it, so empty sentences can cause 
-                # inifinte loops if you are not careful
-                if mine_count == 0:
-                    cells = neighbor_cells
-                    for cell in cells:
-                        self.mark_safe(cell)
-                        changes = True
-                # c) Compare each knowledge sentence against each other sentence. if sentence1 is a 
-                # subset of sentence2, add a new sentence that takes the difference sentence2-sentence1 for both
-                # cells and mine_count and and set the changes flag to True.  Then break out of the inner loop 
-                for sentence_1 in self.knowledge_base:
-                    cells_1 = sentence_1.known_mine_cells
-                    for sentence_2 in self.knowledge_baase:
-                        cells_2 = sentence_2.known_mine_cells
-                        if cells_1 in cells_2:
-                            self.knowledge_base.append(KnowledgeSentence(cells_2-cells_1, len(cells_2)-1))
-                            changes = True
-                            break
-
-
-    # TODO: Implement get_safe_move
+        for safe_cell, mine_count in counts:
+            self._add_sentence(*self._neighbor_sentence(safe_cell, mine_count))
+
+        # 4) Keep the numbers for the patterns, which are looked up once there is no safe move
+        if self.pattern_cache is not None:
+            for safe_cell, mine_count in counts:
+                self._set_pattern_code(safe_cell, mine_count)
+
+        # 5) Infer new knowledge once for all of the new sentences
+        self._infer_knowledge()
+
+    # _new_pattern_board
+    # **********************************
+    # Returns a pattern board with every cell UNKNOWN, surrounded by OUTSIDE
+    def _new_pattern_board(self) -> bytearray:
+        board = bytearray([OUTSIDE]) * (self._pattern_width * (self.height + 2 * RADIUS))
+        row = bytes([UNKNOWN]) * self.width
+        for i in range(self.height):
+            start = (i + RADIUS) * self._pattern_width + RADIUS
+            board[start:start + self.width] = row
+        return board
+
+    # _set_pattern_code
+    # **********************************
+    # Sets the pattern code of a cell and notes that the windows around it changed
+    def _set_pattern_code(self, cell: Tuple[int, int], code: int) -> None:
+        index = (cell[0] + RADIUS) * self._pattern_width + cell[1] + RADIUS
+        self._pattern_board[index] = code
+        self._pattern_changes.add(index)
+
+    # _apply_patterns
+    # **********************************
+    # Looks up the window around every revealed cell that has a changed cell in it, marks what
+    # they imply and infers from it.  A window that didn't change can't imply anything new.
+    def _apply_patterns(self) -> None:
+        board = self._pattern_board
+        deltas = [dr * self._pattern_width + dc
+                  for dr in range(-RADIUS, RADIUS + 1) for dc in range(-RADIUS, RADIUS + 1)]
+        centers = set()
+        for index in self._pattern_changes:
+            for delta in deltas:
+                if board[index + delta] <= 8:
+                    centers.add(index + delta)
+        self._pattern_changes.clear()
+
+        for center in sorted(centers):
+            self._apply_pattern(center)
+        self._infer_knowledge()
+
+    # _apply_pattern
+    # **********************************
+    # Takes the window of the pattern board around the given index that the pattern cache works
+    # on and marks the mines and safe cells it implies.
+    def _apply_pattern(self, center: int) -> None:
+        board = self._pattern_board
+        width = self._pattern_width
+        top = center - RADIUS * width - RADIUS
+        window = bytearray().join(board[start:start + SIZE]
+                                  for start in range(top, top + SIZE * width, width))
+
+        # nothing to work out if every cell is already known
+        if UNKNOWN not in window:
+            return
+
+        # only the numbers in the middle have all of their neighbors in the window
+        outer = window.translate(_RING_CODES)
+        for r in range(1, SIZE - 1):
+            outer[r * SIZE + 1:(r + 1) * SIZE - 1] = window[r * SIZE + 1:(r + 1) * SIZE - 1]
+
+        # the top left of the window in the pattern board is the center in the board, as it is padded by RADIUS
+        (row, col) = divmod(top, width)
+        for position, is_mine in self.pattern_cache.deduce(outer):
+            cell = (row + position // SIZE - RADIUS, col + position % SIZE - RADIUS)
+            if is_mine:
+                self.mark_mine(cell)
+            else:
+                self.mark_safe(cell)
+
+    # _infer_knowledge
+    # **********************************
+    # Works through the queue of sentences that were added or changed until it is empty.  Marking
+    # cells and adding sentences queue more sentences, so when this returns no rule can find
+    # anything new.
+    def _infer_knowledge(self) -> None:
+        while len(self._pending) > 0:
+            sentence = self._pending.popleft()
+
+            # empty sentences don't tell us anything
+            if sentence.mask == 0:
+                continue
+
+            # neither does a sentence that became equal to another one, which has been or will
+            # be checked against the same sentences
+            if self._has_sentence(sentence):
+                self._drop_sentence(sentence)
+                continue
+
+            # a) if the mine count equals the number of cells, all of them are mines.  The ids are
+            # a copy, so marking a mine doesn't change what we iterate over
+            size = sentence.mask.bit_count()
+            if sentence.mine_count == size:
+                for cell_id in sentence.cell_ids():
+                    self.mark_mine(divmod(cell_id, self.width))
+
+            # b) if the count is 0, all of the cells are safe
+            elif sentence.mine_count == 0:
+                for cell_id in sentence.cell_ids():
+                    self.mark_safe(divmod(cell_id, self.width))
+
+            # c) Compare the sentence against each sentence it shares a cell with.  If one is a 
+            # subset of the other, add a new sentence that takes the difference of the two for
+            # both cells and mine_count
+            else:
+                for other in self._overlapping_sentences(sentence):
+                    other_size = other.mask.bit_count()
+                    if size < other_size and sentence.issubset(other):
+                        new_sentence = other.difference(sentence)
+                    elif other_size < size and other.issubset(sentence):
+                        new_sentence = sentence.difference(other)
+                    else:
+                        continue
+                    if not self._has_sentence(new_sentence):
+                        self._add_sentence(new_sentence)
+
+        if (len(self.knowledge_base) > COMPACTION_THRESHOLD and 
+                len(self.knowledge_base) > 2 * self.sentence_count):
+            self.compact()
+
+    # get_safe_move
     # *************************************
     # This function will see if there is a possible safe move.  If there is it will return
-    # that safe cell, if there is not, it will return None.
+    # that safe cell, if there is not, it will return None.  The cell stays the next safe move
+    # until it has been clicked.  With a pattern cache, the patterns that changed are looked up
+    # before giving up.
     def get_safe_move(self) -> Tuple[int, int]:
-        if len(self.known_safe_cells) > 0:
-            return self.known_safe_cells[0]
+        while True:
+            while len(self._safe_moves) > 0:
+                cell = self._safe_moves[0] if self.move_policy is None else self._safe_moves[0][2]
+                if cell not in self.moves_made:
+                    return cell
+                if self.move_policy is None:
+                    self._safe_moves.popleft()
+                else:
+                    heapq.heappop(self._safe_moves)
+            if len(self._pattern_changes) == 0:
+                return None
+            self._apply_patterns()
+
+    # _add_safe_move
+    # *************************************
+    # Queues a cell that was found to be safe as a move, by the move policy if there is one
+    def _add_safe_move(self, cell: Tuple[int, int]) -> None:
+        if self.move_policy is None:
+            self._safe_moves.append(cell)
         else:
+            heapq.heappush(self._safe_moves, 
+                           (self.move_policy(self, cell), next(self._safe_move_order), cell))
+
+    # get_mine_probabilities
+    # *************************************
+    # Returns the chance that each cell not yet known to be safe or a mine is a mine, worked out
+    # from the knowledge base and, if it is known, the number of mines left.
+    def get_mine_probabilities(self) -> Dict[Tuple[int, int], float]:
+        unknown_cells = self.all_cells - self.known_safe_cells - self.known_mine_cells
+        constraints = [(frozenset(sentence.cells), sentence.mine_count)
+                       for sentence in self.knowledge_base if len(sentence) > 0]
+        mines_left = None
+        if self.mine_count is not None:
+            mines_left = self.mine_count - len(self.known_mine_cells)
+        return mine_probabilities(constraints, unknown_cells, mines_left)
+
+    # get_lowest_risk_move
+    # *************************************
+    # Returns a safe move if there is one, otherwise the cell least likely to be a mine.  Returns
+    # None if there are no cells left to pick.
+    def get_lowest_risk_move(self) -> Tuple[int, int]:
+        move = self.get_safe_move()
+        if move is not None:
+            return move
+        probabilities = self.get_mine_probabilities()
+        if len(probabilities) == 0:
             return None
-    
+        return min(probabilities, key=lambda cell: (probabilities[cell], cell))
 
-    # TODO: Implement is_safe_move
+    # is_safe_move
     # *************************************
     # This function will see if the current cell is a safe move.  If there is it will return
     # True, otherwise it will return False.
     def is_safe_move(self, cell: Tuple[int, int]) -> bool:
-        if cell in self.known_mine_cells:
-            return False
-        else:
-            return True
+        return cell in self.known_safe_cells
+
+# Move policies for MinesweeperAI.  Both look at the cell's neighbors when the cell is found to
+# be safe, and lower values are played first.
+
+# Prefers cells that are likely to have no mines around them and open up a region: cells next to
+# a known mine come last, and of the others, those with fewer unknown neighbors come first.
+def prefer_likely_zero(ai: MinesweeperAI, cell: Tuple[int, int]) -> float:
+    mines = 0
+    unknown = 0
+    for offset in ai.surrounding_offsets:
+        (i, j) = cell[0] + offset[0], cell[1] + offset[1]
+        if 0 <= i < ai.height and 0 <= j < ai.width:
+            if (i, j) in ai.known_mine_cells:
+                mines += 1
+            elif (i, j) not in ai.known_safe_cells:
+                unknown += 1
+    return unknown if mines == 0 else 9 + mines
+
+# Prefers cells next to the most revealed numbers, where the number they show adds to the most
+# constraints that are already known.
+def prefer_most_constrained(ai: MinesweeperAI, cell: Tuple[int, int]) -> float:
+    revealed = 0
+    for offset in ai.surrounding_offsets:
+        if (cell[0] + offset[0], cell[1] + offset[1]) in ai.moves_made:
+            revealed += 1
+    return -revealed
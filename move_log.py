@@ -0,0 +1,157 @@
+from typing import Iterator, List, TextIO, Tuple
+import argparse
+import json
+import sys
+import zlib
+from game_status import GameStatus
+from mine_sweeper import Minesweeper, MoveResult
+from mine_sweeper_ai import MinesweeperAI
+
+# Append-only logs of the moves made on a game, and a replayer that streams
+# them back through Minesweeper and MinesweeperAI.
+#
+# A log is a text file of one JSON object per line.  The first line is the
+# game as it was when recording started: its size, seed and the flat indexes
+# (row * width + col) of its mines, revealed cells and flags.  Every line
+# after that is one reveal, flag or unflag and its result: the status of the
+# game, the number of cells that changed and a CRC-32 of their indexes and
+# codes, so a replay can tell if it gets a different result without the log
+# holding every cell of every cascade.
+#
+# Recording:
+#   recorder = MoveRecorder(open("game.log", "w", encoding="utf-8"), minesweeper)
+#   minesweeper.recorder = recorder
+#   ...
+#   recorder.close()
+#
+# Replaying, from the root of the project:
+#   python move_log.py game.log
+
+VERSION = 1
+
+# Raised by replay when the result of a move is not the one in the log, or
+# when the AI knew something about a cell that the game shows is wrong
+class ReplayError(ValueError):
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+# returns the CRC-32 of the changed cells of a result
+def result_checksum(result: MoveResult) -> int:
+    return zlib.crc32(result.cell_codes, zlib.crc32(result.indexes.tobytes()))
+
+# returns the flat indexes of the bytes that are not 0
+def _indexes(plane: bytes) -> List[int]:
+    return [index for index, value in enumerate(plane) if value]
+
+# Writes the moves of a game to a log.  It is set as the recorder of the game,
+# which calls record after every move.  Lines are buffered by the file, so
+# close the recorder, or flush it, to be sure they are all written.
+class MoveRecorder():
+    def __init__(self, file_data: TextIO, game: Minesweeper) -> None:
+        self.file_data = file_data
+        self.moves = 0
+        (board, revealed, flags) = game.get_state()
+        header = {"version": VERSION,
+                  "height": game.height,
+                  "width": game.width,
+                  "mine_count": game.mine_count,
+                  "seed": game.seed,
+                  "status": game.status.name,
+                  "mines": _indexes(board),
+                  "revealed": _indexes(revealed),
+                  "flags": _indexes(flags)}
+        file_data.write(json.dumps(header, separators=(",", ":")) + "\n")
+
+    def record(self, action: str, cell: Tuple[int, int], result: MoveResult) -> None:
+        self.moves += 1
+        self.file_data.write(f'{{"action":"{action}","cell":[{cell[0]},{cell[1]}],'
+                             f'"status":"{result.status.name}","cells":{len(result.indexes)},'
+                             f'"crc":{result_checksum(result)}}}\n')
+
+    def flush(self) -> None:
+        self.file_data.flush()
+
+    def close(self) -> None:
+        self.file_data.close()
+
+# One move of a replay: its line in the log, what was done and the result
+class ReplayStep():
+    def __init__(self, line: int, action: str, cell: Tuple[int, int], result: MoveResult) -> None:
+        self.line = line
+        self.action = action
+        self.cell = cell
+        self.result = result
+
+# Creates the game a log starts from, given its first line
+def _game_from_header(header: dict) -> Minesweeper:
+    if header.get("version") != VERSION:
+        raise ValueError(f"Unsupported move log version {header.get('version')}")
+    cells = header["height"] * header["width"]
+    planes = []
+    for name in ("mines", "revealed", "flags"):
+        plane = bytearray(cells)
+        for index in header[name]:
+            plane[index] = 1
+        planes.append(plane)
+    return Minesweeper.from_state(header["height"], header["width"], header["mine_count"],
+                                  *planes, header["seed"], GameStatus[header["status"]])
+
+# Streams the moves of a log back through a new game, checking each result
+# against the log, and yields a ReplayStep for each one.  The log is read a
+# line at a time, so any number of moves can be replayed.  If ai is given it
+# must be new and the size of the game: it is given every reveal, and a
+# reveal that loses on a cell it knew to be safe, or reveals a cell it knew
+# to be a mine, is a ReplayError.
+def replay(file_data: TextIO, ai: MinesweeperAI = None) -> Iterator[ReplayStep]:
+    game = _game_from_header(json.loads(file_data.readline()))
+    actions = {"reveal": game.reveal_cell,
+               "flag": game.flag_possible_mine,
+               "unflag": game.unflag_possible_mine}
+
+    for line, text in enumerate(file_data, 2):
+        record = json.loads(text)
+        cell = tuple(record["cell"])
+        result = actions[record["action"]](cell)
+
+        if (result.status.name != record["status"] or
+                len(result.indexes) != record["cells"] or
+                result_checksum(result) != record["crc"]):
+            raise ReplayError(line, f"{record['action']} of {cell} gave a different result than the log")
+
+        if ai is not None and record["action"] == "reveal":
+            if result.status == GameStatus.LOST:
+                if cell in ai.known_safe_cells:
+                    raise ReplayError(line, f"the AI knew {cell} was safe but it is a mine")
+            else:
+                if cell in ai.known_mine_cells:
+                    raise ReplayError(line, f"the AI knew {cell} was a mine but it is safe")
+                ai.add_knowledge_many(result.codes)
+
+        yield ReplayStep(line, record["action"], cell, result)
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a Minesweeper move log and check its results.")
+    parser.add_argument("log", help="move log to replay")
+    parser.add_argument("--no-ai", action="store_true", help="replay without checking the AI")
+    args = parser.parse_args(argv)
+
+    with open(args.log, "r", encoding="utf-8") as file_data:
+        header = json.loads(file_data.readline())
+        file_data.seek(0)
+        ai = None if args.no_ai else MinesweeperAI(header["height"], header["width"], header["mine_count"])
+        moves = 0
+        status = GameStatus[header["status"]]
+        try:
+            for step in replay(file_data, ai):
+                moves += 1
+                status = step.result.status
+        except ReplayError as error:
+            print(f"{args.log}: {error}")
+            return 1
+
+    print(f"{args.log}: {moves} moves replayed, game {status.name}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
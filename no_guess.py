@@ -0,0 +1,237 @@
+from multiprocessing import Pool
+from typing import Iterator, List, Tuple
+import argparse
+import os
+import random
+import struct
+import time
+from game_status import GameStatus
+from mine_sweeper import Minesweeper
+from mine_sweeper_ai import MinesweeperAI
+
+# Generator of boards that can be solved from the first click without a
+# guess, using only what MinesweeperAI can infer.
+#
+# A candidate board is played by the AI, which only ever clicks cells it
+# knows are safe.  If it gets stuck, a mine next to the revealed area is
+# moved somewhere away from it and the board is played again; a board that
+# is still stuck after max_repairs moves is thrown away for a new one.  If
+# max_attempts candidates in a row are thrown away, which happens when there
+# are too many mines for the AI to ever solve the board, generating fails.
+# Boards are generated across a process pool, each from its own seed drawn
+# from the seed of the run, and written to a corpus file.
+#
+# Example:
+#   python no_guess.py --boards 1000 --height 16 --width 30 --mines 99 --out expert.ngc
+#
+# A corpus is a header followed by one record per board: the seed it was
+# generated from and its mines as a bitmap of height * width bits, bit k of
+# the little endian bitmap being the cell with flat index k.
+
+MAGIC = b"MSNG"
+VERSION = 1
+
+# magic, version, height, width, mine count, first click row and column, boards
+HEADER = struct.Struct("<4sHIIIIII")
+RECORD_SEED = struct.Struct("<Q")
+
+# Plays the game with the AI from first_click, clicking only the cells it
+# knows are safe.  Once no mines are left, every unknown cell is safe too.
+# Returns the AI, the game is won if the board could be solved.
+def solve(game: Minesweeper, first_click: Tuple[int, int]) -> MinesweeperAI:
+    ai = MinesweeperAI(game.height, game.width, game.mine_count)
+    move = first_click
+    while move is not None:
+        result = game.reveal_cell(move)
+        if result.status != GameStatus.ACTIVE:
+            break
+        ai.add_knowledge_many(result.codes)
+
+        move = ai.get_safe_move()
+        if move is None and len(ai.known_mine_cells) == game.mine_count:
+            for cell in ai.all_cells - ai.moves_made - ai.known_mine_cells:
+                ai.mark_safe(cell)
+            move = ai.get_safe_move()
+    return ai
+
+# Moves one of the mines next to the revealed cells of a game the AI got stuck
+# on to a cell away from them, outside of the first click's neighborhood.
+# Returns False if there is no mine or no cell to move it to.
+def _repair(board: bytearray,
+            game: Minesweeper,
+            ai: MinesweeperAI,
+            first_click: Tuple[int, int],
+            rng: random.Random) -> bool:
+    width = game.width
+    frontier_mines = []
+    targets = []
+    for (i, j) in ai.all_cells - ai.moves_made - ai.known_mine_cells:
+        index = i * width + j
+        on_frontier = any(game.is_revealed((r, c))
+                          for r in range(max(i - 1, 0), min(i + 2, game.height))
+                          for c in range(max(j - 1, 0), min(j + 2, width)))
+        if on_frontier:
+            if board[index]:
+                frontier_mines.append(index)
+        elif not board[index] and (abs(i - first_click[0]) > 1 or abs(j - first_click[1]) > 1):
+            targets.append(index)
+
+    if len(frontier_mines) == 0 or len(targets) == 0:
+        return False
+    board[rng.choice(sorted(frontier_mines))] = 0
+    board[rng.choice(sorted(targets))] = 1
+    return True
+
+# Generates a board that the AI can solve from first_click without guessing.
+# Returns its mines as one byte per cell, like Minesweeper.get_state, and the
+# number of candidate boards that were thrown away.  Raises ValueError if
+# none of max_attempts candidates could be solved.
+def generate_board(height: int,
+                   width: int,
+                   mine_count: int,
+                   first_click: Tuple[int, int],
+                   rng: random.Random,
+                   max_repairs: int = 20,
+                   max_attempts: int = 100) -> Tuple[bytes, int]:
+    if max_attempts < 1:
+        raise ValueError("max_attempts must be at least 1")
+    empty = bytes(height * width)
+    rejected = 0
+    while rejected < max_attempts:
+        board = bytearray(Minesweeper(height, width, mine_count, rng=rng, safe_cell=first_click).get_state()[0])
+        for _ in range(max_repairs + 1):
+            game = Minesweeper.from_state(height, width, mine_count, board, empty, empty)
+            ai = solve(game, first_click)
+            if game.status == GameStatus.WON:
+                return bytes(board), rejected
+            if not _repair(board, game, ai, first_click, rng):
+                break
+        rejected += 1
+    raise ValueError(f"No board solvable without guessing found in {max_attempts} attempts "
+                     f"with {mine_count} mines on {height}x{width}")
+
+# generates the board of one seed, since Pool.imap only passes one argument
+def _generate(args: Tuple[int, int, int, Tuple[int, int], int, int, int]) -> Tuple[int, bytes, int]:
+    (height, width, mine_count, first_click, max_repairs, max_attempts, seed) = args
+    board, rejected = generate_board(height, width, mine_count, first_click, random.Random(seed),
+                                     max_repairs, max_attempts)
+    return seed, board, rejected
+
+# packs a board of one byte per cell into a bitmap
+def _pack(board: bytes) -> bytes:
+    mask = 0
+    index = board.find(1)
+    while index >= 0:
+        mask |= 1 << index
+        index = board.find(1, index + 1)
+    return mask.to_bytes((len(board) + 7) // 8, "little")
+
+# Generates boards across a pool of processes and writes them to a corpus at
+# path.  The seed of every board is drawn from seed, so a corpus can be
+# generated again exactly.  Returns the number of candidates thrown away.
+# Raises ValueError, like generate_board, if a board can't be generated.
+def generate_corpus(path: str,
+                    boards: int,
+                    height: int,
+                    width: int,
+                    mine_count: int,
+                    first_click: Tuple[int, int] = None,
+                    processes: int = None,
+                    seed: int = None,
+                    max_repairs: int = 20,
+                    max_attempts: int = 100) -> int:
+    if first_click is None:
+        first_click = (height // 2, width // 2)
+    rng = random.Random(seed)
+    jobs = [(height, width, mine_count, first_click, max_repairs, max_attempts, rng.getrandbits(64))
+            for _ in range(boards)]
+    processes = processes or os.cpu_count() or 1
+
+    rejected = 0
+    with open(path, "wb") as file_data:
+        file_data.write(HEADER.pack(MAGIC, VERSION, height, width, mine_count,
+                                    first_click[0], first_click[1], boards))
+
+        def write(results: Iterator[Tuple[int, bytes, int]]) -> int:
+            rejected = 0
+            for board_seed, board, board_rejected in results:
+                file_data.write(RECORD_SEED.pack(board_seed))
+                file_data.write(_pack(board))
+                rejected += board_rejected
+            return rejected
+
+        if processes == 1:
+            rejected = write(_generate(job) for job in jobs)
+        else:
+            # boards are written in the order of their seeds as they come back
+            chunksize = max(1, boards // (processes * 8))
+            with Pool(processes) as pool:
+                rejected = write(pool.imap(_generate, jobs, chunksize))
+    return rejected
+
+# A corpus of boards.  Iterating it reads one board at a time and yields its
+# seed and a new game on it.  The seed is the one generate_board was given,
+# which doesn't place the mines of a repaired board the way Minesweeper does,
+# so the game itself has no seed.
+class Corpus():
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as file_data:
+            (magic, version, height, width, mine_count, row, col, boards) = HEADER.unpack(file_data.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("Not a no-guess board corpus")
+        if version != VERSION:
+            raise ValueError(f"Unsupported corpus version {version}")
+        self.height = height
+        self.width = width
+        self.mine_count = mine_count
+        self.first_click = (row, col)
+        self.boards = boards
+
+    def __len__(self) -> int:
+        return self.boards
+
+    def __iter__(self) -> Iterator[Tuple[int, Minesweeper]]:
+        cells = self.height * self.width
+        size = (cells + 7) // 8
+        empty = bytes(cells)
+        with open(self.path, "rb") as file_data:
+            file_data.seek(HEADER.size)
+            for _ in range(self.boards):
+                (seed,) = RECORD_SEED.unpack(file_data.read(RECORD_SEED.size))
+                bitmap = file_data.read(size)
+                if len(bitmap) != size:
+                    raise ValueError("Corpus is truncated")
+                mask = int.from_bytes(bitmap, "little")
+                board = bytearray(cells)
+                while mask:
+                    low = mask & -mask
+                    board[low.bit_length() - 1] = 1
+                    mask ^= low
+                yield seed, Minesweeper.from_state(self.height, self.width, self.mine_count,
+                                                   board, empty, empty)
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate boards the AI can solve without guessing.")
+    parser.add_argument("--boards", type=int, default=100, help="number of boards to generate")
+    parser.add_argument("--height", type=int, default=16, help="rows on the board")
+    parser.add_argument("--width", type=int, default=16, help="columns on the board")
+    parser.add_argument("--mines", type=int, default=40, help="number of mines")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for repeatable runs")
+    parser.add_argument("--max-repairs", type=int, default=20,
+                        help="mines moved on a board before it is thrown away (default 20)")
+    parser.add_argument("--max-attempts", type=int, default=100,
+                        help="boards thrown away in a row before giving up (default 100)")
+    parser.add_argument("--out", required=True, help="corpus file to write")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rejected = generate_corpus(args.out, args.boards, args.height, args.width, args.mines,
+                               processes=args.processes, seed=args.seed, max_repairs=args.max_repairs,
+                               max_attempts=args.max_attempts)
+    elapsed = time.perf_counter() - start
+    print(f"{args.boards} boards written to {args.out} in {elapsed:.2f} s, {rejected} thrown away")
+
+if __name__ == "__main__":
+    main()
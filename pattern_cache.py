@@ -0,0 +1,151 @@
+from collections import OrderedDict
+from operator import itemgetter
+from typing import List, Sequence, Tuple
+from mine_probability import find_components, solve_component
+
+# Cache of what small local patterns of numbers imply, such as 1-2-1 along
+# an edge or 1-1 in a corner.
+#
+# A pattern is the 5x5 window around a revealed cell.  The numbers of the
+# revealed cells in the middle 3x3 are constraints on the unknown cells
+# around them, which all lie inside the window, so whatever those
+# constraints imply on their own is true wherever the pattern shows up.  Only
+# what the constraints depend on is kept: known mines are taken off the numbers
+# next to them, and every other cell that isn't an unknown cell next to a
+# number is made SAFE, so windows that differ in cells that can't matter share
+# an entry.  The window is then put in a canonical form, the smallest of its 8
+# rotations and reflections, so the same shape is found whichever way it is
+# turned.
+
+SIZE = 5                # width and height of a window
+RADIUS = SIZE // 2      # cells from the center to the edge of a window
+
+# codes of the cells of a window, besides the numbers 0 to 8
+UNKNOWN = 9             # not known to be safe or a mine
+MINE = 10               # known mine
+SAFE = 11               # known to be safe, without a number we can use
+OUTSIDE = 12            # off the board
+
+# _TRANSFORMS[t][k] is the position in a window that ends up at position k
+# after the t-th rotation or reflection
+def _build_transforms() -> List[Tuple[int, ...]]:
+    last = SIZE - 1
+    maps = [lambda r, c: (r, c),
+            lambda r, c: (c, last - r),
+            lambda r, c: (last - r, last - c),
+            lambda r, c: (last - c, r),
+            lambda r, c: (r, last - c),
+            lambda r, c: (c, r),
+            lambda r, c: (last - r, c),
+            lambda r, c: (last - c, last - r)]
+    transforms = []
+    for m in maps:
+        positions = []
+        for k in range(SIZE * SIZE):
+            (r, c) = m(k // SIZE, k % SIZE)
+            positions.append(r * SIZE + c)
+        transforms.append(tuple(positions))
+    return transforms
+
+_TRANSFORMS = _build_transforms()
+
+# the codes of a window after each rotation or reflection, as a tuple
+_TRANSFORM_GETTERS = [(itemgetter(*transform), transform) for transform in _TRANSFORMS]
+
+# (position, positions of its neighbors) for each cell of the middle of a window
+_MIDDLE = [(r * SIZE + c, [(r + dr) * SIZE + c + dc
+                           for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr != 0 or dc != 0])
+           for r in range(1, SIZE - 1) for c in range(1, SIZE - 1)]
+
+# Returns the window with only its constraints left in it: the numbers in the
+# middle that are next to unknown cells, less the mines next to them, and those
+# unknown cells.  Everything else is SAFE.  Implies the same as the window.
+def _reduce(window: Sequence[int]) -> List[int]:
+    reduced = [SAFE] * (SIZE * SIZE)
+    for position, neighbors in _MIDDLE:
+        number = window[position]
+        if number > 8:
+            continue
+        unknown = []
+        for neighbor in neighbors:
+            code = window[neighbor]
+            if code == UNKNOWN:
+                unknown.append(neighbor)
+            elif code == MINE:
+                number -= 1
+        if len(unknown) > 0:
+            reduced[position] = number
+            for neighbor in unknown:
+                reduced[neighbor] = UNKNOWN
+    return reduced
+
+# Works out the cells of a window that are certainly safe or mines from the
+# numbers in its middle 3x3.  Returns (position, is_mine) pairs.
+def deduce_pattern(window: Sequence[int]) -> Tuple[Tuple[int, bool], ...]:
+    constraints = []
+    for r in range(1, SIZE - 1):
+        for c in range(1, SIZE - 1):
+            number = window[r * SIZE + c]
+            if number > 8:
+                continue
+            cells = set()
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    position = (r + dr) * SIZE + c + dc
+                    if window[position] == UNKNOWN:
+                        cells.add(position)
+                    elif window[position] == MINE:
+                        number -= 1
+            if len(cells) > 0:
+                constraints.append((frozenset(cells), number))
+
+    deductions = []
+    for component in find_components(constraints):
+        solution = solve_component(component)
+        total = sum(solution.solutions.values())
+        for i, position in enumerate(solution.cells):
+            mines = sum(counts[i] for counts in solution.cell_solutions.values())
+            if mines == 0:
+                deductions.append((position, False))
+            elif mines == total:
+                deductions.append((position, True))
+    return tuple(sorted(deductions))
+
+# LRU cache from canonical windows to their deductions, with hit and miss
+# counters.  A cache can be shared by any number of MinesweeperAI objects.
+class PatternCache():
+    def __init__(self, max_size: int = 65536) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    # Returns the (position, is_mine) pairs implied by a window, given as
+    # SIZE * SIZE codes in row order.  Positions are in the given window, not
+    # the canonical one.  A window without constraints isn't looked up.
+    def deduce(self, window: Sequence[int]) -> List[Tuple[int, bool]]:
+        reduced = _reduce(window)
+        if UNKNOWN not in reduced:
+            return []
+        key, transform = min((getter(reduced), transform) for getter, transform in _TRANSFORM_GETTERS)
+
+        deductions = self._entries.get(key)
+        if deductions is None:
+            self.misses += 1
+            deductions = deduce_pattern(key)
+            self._entries[key] = deductions
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+        return [(transform[position], is_mine) for (position, is_mine) in deductions]
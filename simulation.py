@@ -0,0 +1,228 @@
+from multiprocessing import Pool
+from typing import List, Tuple
+import argparse
+import os
+import random
+import time
+from game_status import GameStatus
+from mine_sweeper import Minesweeper
+from mine_sweeper_ai import MinesweeperAI, prefer_likely_zero, prefer_most_constrained
+from pattern_cache import PatternCache
+
+# Headless runner that plays complete games of Minesweeper with the
+# MinesweeperAI, without pygame or a display.  Games are spread across a
+# process pool and the results are combined into a SimulationReport.
+#
+# Example:
+#   python simulation.py --games 1000 --height 16 --width 30 --mines 99
+#
+# With --pattern-cache, every worker process keeps one PatternCache that is
+# shared by all of the games it plays.
+
+# the move policies that can be picked with --move-policy, by name
+MOVE_POLICIES = {"fifo": None,
+                 "likely-zero": prefer_likely_zero,
+                 "most-constrained": prefer_most_constrained}
+
+# the pattern cache of this process, if the run uses one
+_pattern_cache: PatternCache = None
+
+# Result of a single game played by the AI
+class GameResult():
+    def __init__(self,
+                 seed: int,
+                 status: GameStatus,
+                 moves: int,
+                 guesses: int,
+                 knowledge_times: List[float],
+                 pattern_hits: int = 0,
+                 pattern_misses: int = 0,
+                 peak_sentences: int = 0) -> None:
+        self.seed = seed
+        self.status = status
+        self.moves = moves                      # number of cells clicked
+        self.guesses = guesses                  # clicks made without a known safe cell
+        self.knowledge_times = knowledge_times  # seconds taken by each add_knowledge_many call
+        self.pattern_hits = pattern_hits        # pattern cache lookups during the game
+        self.pattern_misses = pattern_misses
+        self.peak_sentences = peak_sentences    # most sentences in the AI's knowledge base at once
+
+# Combined results of a batch of games
+class SimulationReport():
+    def __init__(self, results: List[GameResult], elapsed: float) -> None:
+        self.games = len(results)
+        self.wins = sum(1 for result in results if result.status == GameStatus.WON)
+        self.moves = sum(result.moves for result in results)
+        self.guesses = sum(result.guesses for result in results)
+        self.games_with_guesses = sum(1 for result in results if result.guesses > 0)
+        self.pattern_hits = sum(result.pattern_hits for result in results)
+        self.pattern_misses = sum(result.pattern_misses for result in results)
+        self.peak_sentences = max((result.peak_sentences for result in results), default=0)
+        self.elapsed = elapsed
+
+        times = sorted(t for result in results for t in result.knowledge_times)
+        self.knowledge_calls = len(times)
+        self.knowledge_p50 = _percentile(times, 50)
+        self.knowledge_p99 = _percentile(times, 99)
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games > 0 else 0.0
+
+    @property
+    def moves_per_second(self) -> float:
+        return self.moves / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def guess_rate(self) -> float:
+        return self.guesses / self.moves if self.moves > 0 else 0.0
+
+    @property
+    def pattern_hit_rate(self) -> float:
+        lookups = self.pattern_hits + self.pattern_misses
+        return self.pattern_hits / lookups if lookups > 0 else 0.0
+
+    def __str__(self) -> str:
+        lines = [
+            f"games:              {self.games}",
+            f"win rate:           {self.win_rate:.2%} ({self.wins} won)",
+            f"moves:              {self.moves} ({self.moves_per_second:,.0f} per second)",
+            f"guesses:            {self.guesses} ({self.guess_rate:.2%} of moves, "
+            f"{self.games_with_guesses} games needed one)",
+            f"add knowledge p50:  {self.knowledge_p50 * 1e6:,.1f} us",
+            f"add knowledge p99:  {self.knowledge_p99 * 1e6:,.1f} us",
+            f"peak sentences:     {self.peak_sentences}",
+            f"elapsed:            {self.elapsed:.2f} s"]
+        if self.pattern_hits + self.pattern_misses > 0:
+            lines.append(f"pattern cache:      {self.pattern_hit_rate:.2%} hits "
+                         f"({self.pattern_hits} of {self.pattern_hits + self.pattern_misses})")
+        return "\n".join(lines)
+
+# returns the given percentile of an already sorted list, 0 if it is empty
+def _percentile(values: List[float], percentile: float) -> float:
+    if len(values) == 0:
+        return 0.0
+    index = min(len(values) - 1, int(len(values) * percentile / 100))
+    return values[index]
+
+# Plays one game to the end.  The first click is picked at random and the
+# board is built so that it is safe; after that the AI makes every move,
+# taking the cell least likely to be a mine when it does not know of a safe
+# one.
+def play_game(height: int, 
+              width: int, 
+              mine_count: int, 
+              seed: int, 
+              pattern_cache: PatternCache = None,
+              move_policy: str = "fifo") -> GameResult:
+    rng = random.Random(seed)
+    first_click = (rng.randrange(height), rng.randrange(width))
+    minesweeper = Minesweeper(height, width, mine_count, seed=seed, safe_cell=first_click)
+    ai = MinesweeperAI(height, width, mine_count, pattern_cache, MOVE_POLICIES[move_policy])
+    if pattern_cache is not None:
+        (hits, misses) = (pattern_cache.hits, pattern_cache.misses)
+
+    knowledge_times = []
+    flagged = set()
+    moves = 0
+    guesses = 0
+    move = first_click
+    status = GameStatus.ACTIVE
+    while status == GameStatus.ACTIVE:
+        result = minesweeper.reveal_cell(move)
+        moves += 1
+        status = result.status
+        if status != GameStatus.ACTIVE:
+            break
+
+        start = time.perf_counter()
+        ai.add_knowledge_many(result.codes)
+        knowledge_times.append(time.perf_counter() - start)
+
+        # flag the mines the AI has found, the game is won once all are flagged
+        for mine in ai.known_mine_cells - flagged:
+            flagged.add(mine)
+            status = minesweeper.flag_possible_mine(mine).status
+        if status != GameStatus.ACTIVE:
+            break
+
+        move = ai.get_safe_move()
+        if move is None:
+            # if every cell left is a mine there is nothing left to guess
+            unknown = ai.all_cells - ai.moves_made - ai.known_mine_cells
+            if len(unknown) == mine_count - len(ai.known_mine_cells):
+                for mine in unknown:
+                    status = minesweeper.flag_possible_mine(mine).status
+                break
+
+            move = ai.get_lowest_risk_move()
+            guesses += 1
+
+    if pattern_cache is None:
+        return GameResult(seed, status, moves, guesses, knowledge_times, 
+                          peak_sentences=ai.peak_sentence_count)
+    return GameResult(seed, status, moves, guesses, knowledge_times,
+                      pattern_cache.hits - hits, pattern_cache.misses - misses, ai.peak_sentence_count)
+
+# sets up the pattern cache of a process, 0 meaning no cache
+def _init_worker(pattern_cache_size: int) -> None:
+    global _pattern_cache
+    _pattern_cache = PatternCache(pattern_cache_size) if pattern_cache_size > 0 else None
+
+# unpacks the arguments for play_game, since Pool.imap only passes one
+def _play_game(args: Tuple[int, int, int, int, str]) -> GameResult:
+    (height, width, mine_count, seed, move_policy) = args
+    return play_game(height, width, mine_count, seed, _pattern_cache, move_policy)
+
+# Plays the given number of games across a pool of processes.  The seed of
+# every game is drawn from seed, so a run can be repeated exactly.
+def run_simulation(games: int,
+                   height: int,
+                   width: int,
+                   mine_count: int,
+                   processes: int = None,
+                   seed: int = None,
+                   pattern_cache_size: int = 0,
+                   move_policy: str = "fifo") -> SimulationReport:
+    rng = random.Random(seed)
+    jobs = [(height, width, mine_count, rng.getrandbits(64), move_policy) for _ in range(games)]
+    processes = processes or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if processes == 1:
+        _init_worker(pattern_cache_size)
+        results = [_play_game(job) for job in jobs]
+    else:
+        # hand out games in chunks so the workers are not waiting on the queue
+        chunksize = max(1, games // (processes * 8))
+        with Pool(processes, _init_worker, (pattern_cache_size,)) as pool:
+            results = list(pool.imap_unordered(_play_game, jobs, chunksize))
+    return SimulationReport(results, time.perf_counter() - start)
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Play Minesweeper games with the AI without a display.")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--height", type=int, default=16, help="rows on the board")
+    parser.add_argument("--width", type=int, default=16, help="columns on the board")
+    mines = parser.add_mutually_exclusive_group()
+    mines.add_argument("--mines", type=int, help="number of mines (default 40)")
+    mines.add_argument("--density", type=float, help="fraction of the cells that are mines")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for repeatable runs")
+    parser.add_argument("--pattern-cache", type=int, default=0, metavar="SIZE",
+                        help="patterns kept in each worker's pattern cache (default: no cache)")
+    parser.add_argument("--move-policy", choices=sorted(MOVE_POLICIES), default="fifo",
+                        help="order in which the AI plays the safe cells it finds (default: fifo)")
+    args = parser.parse_args(argv)
+
+    if args.density is not None:
+        mine_count = round(args.height * args.width * args.density)
+    else:
+        mine_count = args.mines if args.mines is not None else 40
+
+    report = run_simulation(args.games, args.height, args.width, mine_count, 
+                            args.processes, args.seed, args.pattern_cache, args.move_policy)
+    print(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+from typing import Callable, Dict, List, Tuple
+import mmap
+import struct
+from game_status import GameStatus
+from mine_sweeper import Minesweeper
+from mine_sweeper_ai import MinesweeperAI
+from pattern_cache import PatternCache
+
+# Binary snapshots of a game and, optionally, the knowledge of its AI.
+#
+# A snapshot is a fixed header followed by planes of one byte per cell,
+# indexed by row * width + col, the same layout Minesweeper uses for its
+# board.  Loading maps the file into memory, so the planes are memoryviews
+# of the file itself: nothing is parsed or copied until a game or AI is
+# restored from it, and a large corpus of snapshots can be scanned cheaply.
+#
+#   header         HEADER, see below
+#   board          1 where there is a mine
+#   revealed       1 where the cell has been revealed
+#   flags          1 where the cell is flagged
+# and with FLAG_AI set:
+#   ai header      AI_HEADER: the AI's mine count (-1 if it has none) and
+#                  the number of sentences
+#   ai cells       AI_MINE, AI_SAFE and AI_MOVE bits of each cell
+#   sentences      SENTENCE followed by the bytes of the mask, little endian,
+#                  for each sentence of the knowledge base that is not empty
+#
+# All numbers are little endian.  The version is raised whenever the layout
+# changes, and loading a version this module doesn't know is an error.
+
+MAGIC = b"MSNP"
+VERSION = 1
+
+# magic, version, flags, height, width, mine count, seed, game status.  The
+# seed is unsigned 64 bits, the size of the seeds games pick for themselves.
+HEADER = struct.Struct("<4sHHIIIQB3x")
+MAX_SEED = 2 ** 64 - 1
+AI_HEADER = struct.Struct("<iI")
+
+# offset, mine count and number of mask bytes of a sentence
+SENTENCE = struct.Struct("<IiI")
+
+# bits of the header flags
+FLAG_SEED = 1       # the game has a seed
+FLAG_AI = 2         # the snapshot holds AI knowledge
+
+# bits of the ai cells plane
+AI_MINE = 1
+AI_SAFE = 2
+AI_MOVE = 4
+
+# Writes a snapshot of the game, and of the AI's knowledge if one is given, to path.
+# A game whose seed doesn't fit in the header can't be saved.
+def save_snapshot(path: str, game: Minesweeper, ai: MinesweeperAI = None) -> None:
+    cells = game.height * game.width
+    flags = FLAG_SEED if game.seed is not None else 0
+    if game.seed is not None and not 0 <= game.seed <= MAX_SEED:
+        raise ValueError(f"Seed {game.seed} is not between 0 and {MAX_SEED}")
+    if ai is not None:
+        if (ai.height, ai.width) != (game.height, game.width):
+            raise ValueError("AI and game are not the same size")
+        flags |= FLAG_AI
+
+    with open(path, "wb") as file_data:
+        file_data.write(HEADER.pack(MAGIC, VERSION, flags, game.height, game.width, game.mine_count,
+                                    game.seed if game.seed is not None else 0, game.status.value))
+        for plane in game.get_state():
+            file_data.write(plane)
+        if ai is None:
+            return
+
+        sentences = [sentence for sentence in ai.knowledge_base if len(sentence) > 0]
+        file_data.write(AI_HEADER.pack(ai.mine_count if ai.mine_count is not None else -1, len(sentences)))
+
+        plane = bytearray(cells)
+        for (bit, known) in ((AI_MINE, ai.known_mine_cells),
+                             (AI_SAFE, ai.known_safe_cells),
+                             (AI_MOVE, ai.moves_made)):
+            for (i, j) in known:
+                plane[i * ai.width + j] |= bit
+        file_data.write(plane)
+
+        for sentence in sentences:
+            mask = sentence.mask.to_bytes((sentence.mask.bit_length() + 7) // 8, "little")
+            file_data.write(SENTENCE.pack(sentence.offset, sentence.mine_count, len(mask)))
+            file_data.write(mask)
+
+# A snapshot file mapped into memory.  board, revealed and flags (and
+# ai_cells if it holds AI knowledge) are memoryviews of the planes in the
+# file.  Close it, or use it in a with block, once it is no longer needed.
+class Snapshot():
+    def __init__(self, path: str) -> None:
+        self.board = self.revealed = self.flags = self.ai_cells = None
+        with open(path, "rb") as file_data:
+            self._map = mmap.mmap(file_data.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        try:
+            self._read_header()
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    def _read_header(self) -> None:
+        (magic, version, flags, height, width, mine_count, seed, status) = HEADER.unpack_from(self._view)
+        if magic != MAGIC:
+            raise ValueError("Not a Minesweeper snapshot")
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}")
+
+        self.version = version
+        self.height = height
+        self.width = width
+        self.mine_count = mine_count
+        self.seed = seed if flags & FLAG_SEED else None
+        self.status = GameStatus(status)
+        self.has_ai = flags & FLAG_AI != 0
+
+        cells = height * width
+        position = HEADER.size
+        planes = []
+        for _ in range(3):
+            planes.append(self._view[position:position + cells])
+            position += cells
+        (self.board, self.revealed, self.flags) = planes
+        if len(self.flags) != cells:
+            raise ValueError("Snapshot is truncated")
+
+        self.ai_mine_count = None
+        self.sentence_count = 0
+        if self.has_ai:
+            (ai_mine_count, self.sentence_count) = AI_HEADER.unpack_from(self._view, position)
+            self.ai_mine_count = ai_mine_count if ai_mine_count >= 0 else None
+            position += AI_HEADER.size
+            self.ai_cells = self._view[position:position + cells]
+            if len(self.ai_cells) != cells:
+                raise ValueError("Snapshot is truncated")
+            self._sentences_position = position + cells
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # releases the views of the file and unmaps it
+    def close(self) -> None:
+        for view in (self.board, self.revealed, self.flags, self.ai_cells, self._view):
+            if view is not None:
+                view.release()
+        self._map.close()
+
+    # the (offset, mask, mine_count) of each sentence of the AI's knowledge base
+    def sentences(self) -> List[Tuple[int, int, int]]:
+        sentences = []
+        position = self._sentences_position
+        for _ in range(self.sentence_count):
+            (offset, mine_count, length) = SENTENCE.unpack_from(self._view, position)
+            position += SENTENCE.size
+            mask = int.from_bytes(self._view[position:position + length], "little")
+            position += length
+            sentences.append((offset, mask, mine_count))
+        return sentences
+
+    # creates the game saved in the snapshot
+    def game(self) -> Minesweeper:
+        return Minesweeper.from_state(self.height, self.width, self.mine_count,
+                                      self.board, self.revealed, self.flags,
+                                      self.seed, self.status)
+
+    # creates an AI with the knowledge saved in the snapshot
+    def ai(self,
+           pattern_cache: PatternCache = None,
+           move_policy: Callable = None) -> MinesweeperAI:
+        if not self.has_ai:
+            raise ValueError("Snapshot has no AI knowledge")
+
+        known = {AI_MINE: set(), AI_SAFE: set(), AI_MOVE: set()}
+        for index, value in enumerate(self.ai_cells):
+            if value != 0:
+                cell = divmod(index, self.width)
+                for bit, cells in known.items():
+                    if value & bit:
+                        cells.add(cell)
+
+        ai = MinesweeperAI(self.height, self.width, self.ai_mine_count, pattern_cache, move_policy)
+        ai.restore_knowledge(known[AI_MINE], known[AI_SAFE], known[AI_MOVE],
+                             self.sentences(), self._revealed_counts(known[AI_MOVE]))
+        return ai
+
+    # the number of mines around each of the given cells, worked out from the board
+    def _revealed_counts(self, cells: set) -> Dict[Tuple[int, int], int]:
+        counts = {}
+        for (i, j) in cells:
+            count = 0
+            for r in range(max(i - 1, 0), min(i + 2, self.height)):
+                for c in range(max(j - 1, 0), min(j + 2, self.width)):
+                    count += self.board[r * self.width + c]
+            counts[(i, j)] = count
+        return counts
+
+# Maps the snapshot at path into memory
+def load_snapshot(path: str) -> Snapshot:
+    return Snapshot(path)
@@ -2,7 +2,8 @@ from unittest import TestCase
 import json
 from game_status import GameStatus
 from mine_sweeper import Minesweeper
-from mine_sweeper_ai import MinesweeperAI
+from mine_sweeper_ai import MinesweeperAI, prefer_likely_zero
+from pattern_cache import PatternCache
 
 class AITests(TestCase):
     def setUp(self) -> None:
@@ -53,3 +54,137 @@ class AITests(TestCase):
         for mine in ai.known_mine_cells:
             minesweeper.flag_possible_mine(mine) 
         self.assertEqual(minesweeper._game_status, GameStatus.WON)
+
+    def test_codes(self) -> None:
+
+        with open("./tests/board.json", "r", encoding="utf-8") as file_data:
+            board = json.loads(file_data.read())
+        with open("./tests/moves.json", "r", encoding="utf-8") as file_data:
+            moves = json.loads(file_data.read())
+
+        minesweeper = Minesweeper(16, 16, 40, board)
+        ai = MinesweeperAI(16, 16)
+        codes_ai = MinesweeperAI(16, 16)
+
+        # the integer codes give the AI the same knowledge as the text updates
+        for move, _ in moves:
+            result = minesweeper.reveal_cell(tuple(move))
+            self.assertEqual(result.updates.keys(), result.codes.keys())
+            for cell, mine_count in result.updates.items():
+                ai.add_knowledge(cell, int(mine_count))
+            for cell, mine_count in result.codes.items():
+                self.assertIsInstance(mine_count, int)
+                codes_ai.add_knowledge(cell, mine_count)
+            self.assertEqual(ai.known_mine_cells, codes_ai.known_mine_cells)
+            self.assertEqual(ai.known_safe_cells, codes_ai.known_safe_cells)
+
+    def test_add_knowledge_many(self) -> None:
+
+        with open("./tests/board.json", "r", encoding="utf-8") as file_data:
+            board = json.loads(file_data.read())
+        with open("./tests/moves.json", "r", encoding="utf-8") as file_data:
+            moves = json.loads(file_data.read())
+
+        minesweeper = Minesweeper(16, 16, 40, board)
+        ai = MinesweeperAI(16, 16)
+        batch_ai = MinesweeperAI(16, 16)
+
+        # a whole reveal at once ends up with the same knowledge as one cell at a time
+        for move, _ in moves:
+            result = minesweeper.reveal_cell(tuple(move))
+            for cell, mine_count in result.codes.items():
+                ai.add_knowledge(cell, mine_count)
+            batch_ai.add_knowledge_many(result.codes)
+            self.assertEqual(ai.known_mine_cells, batch_ai.known_mine_cells)
+            self.assertEqual(ai.known_safe_cells, batch_ai.known_safe_cells)
+
+        # a count that isn't a number is found before any of the cells are added
+        bad_ai = MinesweeperAI(4, 4)
+        with self.assertRaises(ValueError):
+            bad_ai.add_knowledge_many({(0, 0): 1, (1, 1): "x"})
+        self.assertEqual(set(), bad_ai.moves_made)
+        self.assertEqual(set(), bad_ai.known_safe_cells)
+        self.assertEqual(0, bad_ai.sentence_count)
+
+    def test_pattern_lookups(self) -> None:
+        cache = PatternCache()
+        ai = MinesweeperAI(4, 4, 3, cache)
+
+        # patterns are only looked up once the sentences have no safe move
+        ai.add_knowledge((0, 0), 0)
+        self.assertEqual((0, 1), ai.get_safe_move())
+        self.assertEqual(0, cache.hits + cache.misses)
+        for cell, mine_count in (((0, 1), 1), ((1, 0), 1), ((1, 1), 3)):
+            ai.add_knowledge(cell, mine_count)
+        self.assertIsNone(ai.get_safe_move())
+        lookups = cache.hits + cache.misses
+        self.assertGreater(lookups, 0)
+
+        # and a window that didn't change isn't looked up again
+        self.assertIsNone(ai.get_safe_move())
+        self.assertEqual(lookups, cache.hits + cache.misses)
+
+    def test_safe_move_order(self) -> None:
+
+        # a 0 in the corner makes its three neighbors safe
+        ai = MinesweeperAI(4, 4)
+        ai.add_knowledge((0, 0), 0)
+        self.assertEqual(ai.get_safe_move(), (0, 1))
+        self.assertEqual(ai.get_safe_move(), (0, 1))
+
+        # cells that are clicked are not offered again
+        ai.add_knowledge((0, 1), 1)
+        self.assertEqual(ai.get_safe_move(), (1, 0))
+        ai.add_knowledge((1, 0), 1)
+        ai.add_knowledge((1, 1), 1)
+        self.assertNotIn(ai.get_safe_move(), ai.moves_made)
+
+        # the policy leaves the cell with the most unknown neighbors for last
+        ai = MinesweeperAI(4, 4, move_policy=prefer_likely_zero)
+        ai.add_knowledge((0, 0), 0)
+        self.assertIn(ai.get_safe_move(), [(0, 1), (1, 0)])
+        ai.add_knowledge((0, 1), 1)
+        ai.add_knowledge((1, 0), 1)
+        self.assertEqual(ai.get_safe_move(), (1, 1))
+
+    def test_compact(self) -> None:
+
+        # the mine is at (1, 1), and both numbers on the top row say the same about the bottom row
+        ai = MinesweeperAI(2, 2)
+        ai.add_knowledge((0, 0), 1)
+        ai.add_knowledge((0, 1), 1)
+        self.assertEqual(ai.sentence_count, 1)
+        self.assertEqual(ai.peak_sentence_count, 2)
+
+        # once the mine is found every sentence is empty
+        ai.add_knowledge((1, 0), 1)
+        self.assertEqual(ai.known_mine_cells, {(1, 1)})
+        self.assertEqual(ai.sentence_count, 0)
+        ai.compact()
+        self.assertEqual(ai.knowledge_base, [])
+
+    def test_reset(self) -> None:
+
+        with open("./tests/board.json", "r", encoding="utf-8") as file_data:
+            board = json.loads(file_data.read())
+        with open("./tests/moves.json", "r", encoding="utf-8") as file_data:
+            moves = json.loads(file_data.read())
+
+        # a reset AI plays a game the same as a new one
+        ai = MinesweeperAI(16, 16, 40)
+        for move, _ in moves[:len(moves) // 2]:
+            ai.add_knowledge_many(Minesweeper(16, 16, 40, board).reveal_cell(tuple(move)).codes)
+        ai.reset(40)
+        self.assertEqual(ai.sentence_count, 0)
+        self.assertEqual(ai.peak_sentence_count, 0)
+        self.assertIsNone(ai.get_safe_move())
+
+        new_ai = MinesweeperAI(16, 16, 40)
+        minesweeper = Minesweeper(16, 16, 40, board)
+        for move, _ in moves:
+            result = minesweeper.reveal_cell(tuple(move))
+            ai.add_knowledge_many(result.codes)
+            new_ai.add_knowledge_many(result.codes)
+            self.assertEqual(new_ai.known_mine_cells, ai.known_mine_cells)
+            self.assertEqual(new_ai.known_safe_cells, ai.known_safe_cells)
+            self.assertEqual(new_ai.get_safe_move(), ai.get_safe_move())
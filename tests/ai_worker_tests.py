@@ -0,0 +1,66 @@
+from unittest import TestCase
+import threading
+from ai_worker import AIWorker, ERROR, KNOWN_MINES, MOVE
+from game_status import GameStatus
+from mine_sweeper import Minesweeper
+from mine_sweeper_ai import MinesweeperAI
+
+class AIWorkerTests(TestCase):
+    def setUp(self) -> None:
+        return super().setUp()
+
+    def test_plays_game(self) -> None:
+        minesweeper = Minesweeper(4, 4, 3, [[False, False, True, False],
+                                            [False, False, False, True],
+                                            [False, False, False, False],
+                                            [False, True, False, False]])
+        notified = threading.Semaphore(0)
+        worker = AIWorker(MinesweeperAI(4, 4, 3), notified.release)
+        self.assertFalse(worker.busy)
+
+        # knowledge is added before a move asked for after it is worked out
+        result = minesweeper.reveal_cell((3, 3))
+        worker.add_knowledge(result.codes)
+        worker.request_move()
+        self.assertTrue(worker.busy)
+        reply = worker.get_reply(timeout=5)
+        self.assertTrue(notified.acquire(timeout=5))
+        self.assertFalse(worker.busy)
+        self.assertEqual(MOVE, reply.kind)
+        self.assertTrue(reply.safe)
+
+        # safe moves are played until the AI has to guess
+        while reply.safe:
+            result = minesweeper.reveal_cell(reply.value)
+            self.assertNotEqual(GameStatus.LOST, result.status)
+            worker.add_knowledge(result.codes)
+            worker.request_move()
+            reply = worker.get_reply(timeout=5)
+            self.assertEqual(MOVE, reply.kind)
+
+        worker.request_known_mines()
+        reply = worker.get_reply(timeout=5)
+        self.assertEqual(KNOWN_MINES, reply.kind)
+        self.assertEqual(reply.known_mines, len(reply.value))
+        self.assertIsNone(worker.get_reply(block=False))
+
+        worker.stop(wait=True)
+        worker.request_move()
+        self.assertIsNone(worker.get_reply(timeout=0.1))
+
+    def test_knowledge_error(self) -> None:
+        worker = AIWorker(MinesweeperAI(2, 2, 1))
+
+        # a count that isn't a number, which add_knowledge_many fails on
+        with self.assertRaises(ValueError):
+            MinesweeperAI(2, 2, 1).add_knowledge_many({(0, 0): "x"})
+        worker.add_knowledge({(0, 0): "x"})
+        worker.request_move()
+        reply = worker.get_reply(timeout=5)
+        self.assertEqual(ERROR, reply.kind)
+        self.assertIn("'x'", reply.value)
+
+        # the error is only given once
+        worker.request_known_mines()
+        self.assertEqual(KNOWN_MINES, worker.get_reply(timeout=5).kind)
+        worker.stop(wait=True)
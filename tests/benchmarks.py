@@ -0,0 +1,204 @@
+from typing import Callable, Dict, List, Tuple
+import argparse
+import json
+import platform
+import sys
+import time
+from mine_sweeper import Minesweeper
+from mine_sweeper_ai import MinesweeperAI
+
+# Benchmarks for the hot paths of the game engine and the AI.  Results can be
+# saved as a JSON baseline, and a later run checked against it so that a hot
+# path that gets slower than the baseline by more than the tolerance, and by
+# more than MIN_SLOWDOWN, fails.
+#
+# Run from the root of the project:
+#   python -m tests.benchmarks --save     # write a new baseline
+#   python -m tests.benchmarks            # compare against the baseline
+
+BASELINE_PATH = "./tests/benchmark_baseline.json"
+
+# (height, width, mines) of the boards every benchmark runs on
+BOARD_SIZES = [(16, 16, 40),
+               (16, 30, 99),
+               (100, 100, 1600),
+               (500, 500, 40000)]
+
+# most cells of a cascade fed to the AI, so large openings don't take minutes
+MAX_KNOWLEDGE_CELLS = 200
+
+# calls per timing of the benchmarks that take microseconds
+LOOPS = 1000
+
+SEED = 1234
+
+# seconds a benchmark has to get slower by to fail, whatever the tolerance.
+# The ones that take a microsecond or two move by more than the tolerance
+# from one run to the next on a busy machine.
+MIN_SLOWDOWN = 2e-6
+
+# benchmarks that are quick to set up and run are run more than repeat times,
+# until this many seconds were spent on them, so the fastest run is taken from
+# enough of them to be steady
+MIN_TIME = 0.2
+
+# returns the fastest of several runs of setup -> run.  Only run is timed,
+# and it gets whatever setup returns.  One run is made first and not timed,
+# since the first runs in a process are slower.
+def _time(setup: Callable, run: Callable, repeat: int) -> float:
+    run(setup())
+    best = float("inf")
+    runs = 0
+    began = time.perf_counter()
+    while runs < repeat or time.perf_counter() - began < MIN_TIME:
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        best = min(best, time.perf_counter() - start)
+        runs += 1
+    return best
+
+# a board whose first click at the center opens a cascade
+def _new_board(height: int, width: int, mines: int) -> Tuple[Minesweeper, Tuple[int, int]]:
+    first_click = (height // 2, width // 2)
+    return Minesweeper(height, width, mines, seed=SEED, safe_cell=first_click), first_click
+
+# an AI that has been given the first cells of the opening cascade
+def _new_ai(height: int, width: int, mines: int) -> MinesweeperAI:
+    minesweeper, first_click = _new_board(height, width, mines)
+    ai = MinesweeperAI(height, width)
+    for cell, count in list(minesweeper.reveal_cell(first_click).updates.items())[:MAX_KNOWLEDGE_CELLS]:
+        ai.add_knowledge(cell, int(count))
+    return ai
+
+# time per reveal of a numbered cell, up to LOOPS of them on a fresh board.  A
+# revealed cell can't be revealed again, so each call is on a different cell.
+def bench_reveal_cell(height: int, width: int, mines: int, repeat: int) -> float:
+    minesweeper, _ = _new_board(height, width, mines)
+    cells = [(i, j) for i in range(height) for j in range(width)
+             if not minesweeper._board[i * width + j] and
+             minesweeper._get_nearyby_mine_count((i, j)) > 0][:LOOPS]
+
+    def run(game):
+        for cell in cells:
+            game.reveal_cell(cell)
+
+    return _time(lambda: _new_board(height, width, mines)[0], run, repeat) / len(cells)
+
+# the first reveal of a sparse board, which opens most of it
+def bench_reveal_cascade(height: int, width: int, repeat: int) -> float:
+    return _time(lambda: _new_board(height, width, height * width // 100),
+                 lambda board: board[0].reveal_cell(board[1]),
+                 repeat)
+
+# time per add_knowledge call while taking in the opening cascade
+def bench_add_knowledge(height: int, width: int, mines: int, repeat: int) -> float:
+    def setup():
+        minesweeper, first_click = _new_board(height, width, mines)
+        updates = list(minesweeper.reveal_cell(first_click).updates.items())[:MAX_KNOWLEDGE_CELLS]
+        return MinesweeperAI(height, width), updates
+
+    def run(state):
+        ai, updates = state
+        for cell, count in updates:
+            ai.add_knowledge(cell, int(count))
+
+    calls = len(setup()[1])
+    return _time(setup, run, repeat) / calls
+
+# time to take in the whole opening cascade at once
+def bench_add_knowledge_many(height: int, width: int, mines: int, repeat: int) -> float:
+    def setup():
+        minesweeper, first_click = _new_board(height, width, mines)
+        return MinesweeperAI(height, width), minesweeper.reveal_cell(first_click).updates
+
+    return _time(setup, lambda state: state[0].add_knowledge_many(state[1]), repeat)
+
+def bench_get_safe_move(height: int, width: int, mines: int, repeat: int) -> float:
+    ai = _new_ai(height, width, mines)
+
+    def run(ai):
+        for _ in range(LOOPS):
+            ai.get_safe_move()
+
+    return _time(lambda: ai, run, repeat) / LOOPS
+
+# replays the game stored in tests/board.json and tests/moves.json
+def bench_replay(repeat: int) -> float:
+    with open("./tests/board.json", "r", encoding="utf-8") as file_data:
+        board = json.loads(file_data.read())
+    with open("./tests/moves.json", "r", encoding="utf-8") as file_data:
+        moves = json.loads(file_data.read())
+
+    def run(state):
+        minesweeper, ai = state
+        for move, _ in moves:
+            result = minesweeper.reveal_cell(tuple(move))
+            for cell, mine_count in result.updates.items():
+                ai.add_knowledge(cell, int(mine_count))
+
+    return _time(lambda: (Minesweeper(16, 16, 40, board), MinesweeperAI(16, 16)), run, repeat)
+
+# runs every benchmark and returns the time in seconds of each by name
+def run_benchmarks(repeat: int = 5) -> Dict[str, float]:
+    results = {}
+    for (height, width, mines) in BOARD_SIZES:
+        size = f"{height}x{width}"
+        results[f"reveal_cell[{size}]"] = bench_reveal_cell(height, width, mines, repeat)
+        results[f"reveal_cascade[{size}]"] = bench_reveal_cascade(height, width, repeat)
+        results[f"add_knowledge[{size}]"] = bench_add_knowledge(height, width, mines, repeat)
+        results[f"add_knowledge_many[{size}]"] = bench_add_knowledge_many(height, width, mines, repeat)
+        results[f"get_safe_move[{size}]"] = bench_get_safe_move(height, width, mines, repeat)
+    results["replay[board.json]"] = bench_replay(repeat)
+    return results
+
+# returns the names of the benchmarks that are slower than the baseline by
+# more than the tolerance and by more than min_slowdown seconds.  Benchmarks
+# missing from the baseline are skipped.
+def find_regressions(results: Dict[str, float],
+                     baseline: Dict[str, float],
+                     tolerance: float,
+                     min_slowdown: float = MIN_SLOWDOWN) -> List[str]:
+    return [name for name, seconds in results.items()
+            if name in baseline and
+            seconds > baseline[name] * (1 + tolerance) and
+            seconds - baseline[name] > min_slowdown]
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Minesweeper engine and AI.")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed slowdown over the baseline, 0.5 is 50%% (default)")
+    parser.add_argument("--min-slowdown", type=float, default=MIN_SLOWDOWN,
+                        help="seconds a benchmark must also get slower by to fail (default 2e-6)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark, the fastest is kept")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeat)
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as file_data:
+            json.dump({"python": platform.python_version(),
+                       "results": results}, file_data, indent=4)
+            file_data.write("\n")
+        for name, seconds in results.items():
+            print(f"{name:32} {seconds * 1e6:14,.1f} us")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as file_data:
+        baseline = json.load(file_data)["results"]
+
+    for name, seconds in results.items():
+        change = f"{seconds / baseline[name] - 1:+8.1%}" if baseline.get(name) else "     new"
+        print(f"{name:32} {seconds * 1e6:14,.1f} us  {change}")
+
+    regressions = find_regressions(results, baseline, args.tolerance, args.min_slowdown)
+    if len(regressions) > 0:
+        print(f"Slower than the baseline by more than {args.tolerance:.0%} "
+              f"and {args.min_slowdown * 1e6:g} us: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
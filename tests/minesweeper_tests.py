@@ -0,0 +1,138 @@
+from unittest import TestCase
+
+from game_status import GameStatus
+from mine_sweeper import Minesweeper, MoveResult
+
+class MinesweeperTests(TestCase):
+    def setUp(self) -> None:
+        return super().setUp()
+
+    def test_seeded_board(self) -> None:
+        first = Minesweeper(16, 30, 99, seed=42)
+        second = Minesweeper(16, 30, 99, seed=42)
+        self.assertEqual(first._board, second._board)
+        self.assertEqual(99, first._board.count(1))
+
+        # a board without a seed keeps the one it picked
+        third = Minesweeper(16, 30, 99)
+        fourth = Minesweeper(16, 30, 99, seed=third.seed)
+        self.assertEqual(third._board, fourth._board)
+
+    def test_safe_first_click(self) -> None:
+        # every cell outside of the first click's neighborhood is a mine
+        minesweeper = Minesweeper(5, 5, 16, seed=1, safe_cell=(2, 2))
+        for i in range(1, 4):
+            for j in range(1, 4):
+                self.assertEqual(0, minesweeper._board[i * 5 + j])
+        result = minesweeper.reveal_cell((2, 2))
+        self.assertEqual(9, len(result.updates))
+        self.assertEqual("0", result.updates[(2, 2)])
+        self.assertEqual("5", result.updates[(1, 1)])
+        self.assertEqual("3", result.updates[(1, 2)])
+
+        with self.assertRaises(ValueError):
+            Minesweeper(5, 5, 17, safe_cell=(2, 2))
+
+    def test_revealed_cells(self) -> None:
+        # the mines are in the top corners, so a click at the bottom opens all but 4 cells
+        board = [[False] * 4 for _ in range(4)]
+        board[0][0] = True
+        board[0][3] = True
+        minesweeper = Minesweeper(4, 4, 2, board)
+        result = minesweeper.reveal_cell((3, 3))
+        self.assertEqual(GameStatus.ACTIVE, result.status)
+        self.assertEqual(12, len(result.updates))
+        self.assertTrue(minesweeper.is_revealed((1, 1)))
+        self.assertFalse(minesweeper.is_revealed((0, 1)))
+
+        # a second reveal of the same cells changes nothing
+        self.assertEqual({}, minesweeper.reveal_cell((3, 3)).updates)
+        self.assertEqual({}, minesweeper.reveal_cell((1, 1)).updates)
+
+        # revealing the last safe cell wins
+        self.assertEqual(GameStatus.ACTIVE, minesweeper.reveal_cell((0, 1)).status)
+        self.assertEqual(GameStatus.WON, minesweeper.reveal_cell((0, 2)).status)
+
+    def test_zero_regions(self) -> None:
+        # mines in two corners leave a zero cell in each of the others, and the center borders both
+        board = [[False, False, True],
+                 [False, False, False],
+                 [True, False, False]]
+        minesweeper = Minesweeper(3, 3, 2, board)
+        result = minesweeper.reveal_cell((0, 0))
+        self.assertEqual({(0, 0): "0", (0, 1): "1", (1, 0): "1", (1, 1): "2"}, result.updates)
+
+        # the center was revealed with the first region, so it is not revealed again
+        result = minesweeper.reveal_cell((2, 2))
+        self.assertEqual({(2, 2): "0", (1, 2): "1", (2, 1): "1"}, result.updates)
+        self.assertEqual(GameStatus.WON, result.status)
+
+    def test_flags(self) -> None:
+        board = [[False] * 3 for _ in range(3)]
+        board[0][0] = True
+        minesweeper = Minesweeper(3, 3, 1, board)
+
+        # a wrong flag keeps the game going until it is taken off
+        self.assertEqual(GameStatus.ACTIVE, minesweeper.flag_possible_mine((2, 2)).status)
+        self.assertEqual(GameStatus.ACTIVE, minesweeper.flag_possible_mine((0, 0)).status)
+        result = minesweeper.unflag_possible_mine((2, 2))
+        self.assertEqual(GameStatus.WON, result.status)
+        self.assertEqual({(2, 2): Minesweeper.HIDDEN}, result.updates)
+        self.assertEqual({}, minesweeper.unflag_possible_mine((2, 2)).updates)
+
+    def test_flag_in_zero_region(self) -> None:
+        # the mines shut the corner off from the zero region, so the game goes on after it is revealed
+        board = [[False] * 5 for _ in range(5)]
+        board[0][1] = True
+        board[1][0] = True
+        minesweeper = Minesweeper(5, 5, 2, board)
+
+        # a flag on a cell the region takes in comes off with it
+        minesweeper.flag_possible_mine((3, 3))
+        result = minesweeper.reveal_cell((3, 2))
+        self.assertEqual("0", result.updates[(3, 3)])
+        self.assertEqual(GameStatus.ACTIVE, result.status)
+        self.assertEqual({}, minesweeper.unflag_possible_mine((3, 3)).updates)
+        self.assertEqual(0, sum(minesweeper.get_state()[2]))
+
+        # so flagging just the mines wins
+        minesweeper.flag_possible_mine((0, 1))
+        self.assertEqual(GameStatus.WON, minesweeper.flag_possible_mine((1, 0)).status)
+
+    def test_move_result_views(self) -> None:
+        board = [[False] * 3 for _ in range(3)]
+        board[0][0] = True
+        minesweeper = Minesweeper(3, 3, 1, board)
+        result = minesweeper.reveal_cell((2, 2))
+
+        # the views are over the same cells, as text and as codes
+        self.assertEqual(8, len(result.indexes))
+        self.assertEqual(list(result.updates), list(result.codes))
+        self.assertEqual({cell: str(code) for cell, code in result.codes.items()}, dict(result.updates.items()))
+        self.assertEqual(1, result.codes[(1, 1)])
+        self.assertEqual("0", result.updates[(2, 2)])
+        self.assertNotIn((0, 0), result.codes)
+        self.assertNotIn((0, 5), result.codes)
+
+        result = minesweeper.reveal_cell((0, 0))
+        self.assertEqual({(0, 0): MoveResult.MINE}, result.codes)
+        self.assertEqual({(0, 0): Minesweeper.MINE}, result.updates)
+
+    def test_reset(self) -> None:
+        minesweeper = Minesweeper(16, 30, 99, seed=1)
+        minesweeper.flag_possible_mine((0, 0))
+        for i in range(16):
+            if minesweeper.reveal_cell((i, i)).status != GameStatus.ACTIVE:
+                break
+
+        # a reset game is the same as a new one from the same seed, and plays the same
+        minesweeper.reset(seed=42, safe_cell=(8, 15))
+        new = Minesweeper(16, 30, 99, seed=42, safe_cell=(8, 15))
+        self.assertEqual(new.get_state(), minesweeper.get_state())
+        self.assertEqual(42, minesweeper.seed)
+        self.assertEqual(GameStatus.ACTIVE, minesweeper.status)
+        for cell in [(8, 15), (0, 0), (15, 29), (3, 7)]:
+            result = minesweeper.reveal_cell(cell)
+            expected = new.reveal_cell(cell)
+            self.assertEqual(expected.status, result.status)
+            self.assertEqual(dict(expected.codes.items()), dict(result.codes.items()))
@@ -0,0 +1,63 @@
+from unittest import TestCase
+import io
+import json
+from game_status import GameStatus
+from mine_sweeper import Minesweeper
+from mine_sweeper_ai import MinesweeperAI
+from move_log import MoveRecorder, ReplayError, replay
+
+class MoveLogTests(TestCase):
+    def setUp(self) -> None:
+        return super().setUp()
+
+    # plays the game in tests/moves.json with a recorder and returns the log
+    def record_game(self) -> str:
+        with open("./tests/board.json", "r", encoding="utf-8") as file_data:
+            board = json.loads(file_data.read())
+        with open("./tests/moves.json", "r", encoding="utf-8") as file_data:
+            moves = json.loads(file_data.read())
+
+        minesweeper = Minesweeper(16, 16, 40, board)
+        log = io.StringIO()
+        minesweeper.recorder = MoveRecorder(log, minesweeper)
+        ai = MinesweeperAI(16, 16)
+        for move, _ in moves:
+            result = minesweeper.reveal_cell(tuple(move))
+            ai.add_knowledge_many(result.codes)
+        for mine in ai.known_mine_cells:
+            minesweeper.flag_possible_mine(mine)
+        self.assertEqual(len(moves) + 40, minesweeper.recorder.moves)
+        return log.getvalue()
+
+    def test_replay(self) -> None:
+        log = self.record_game()
+        steps = list(replay(io.StringIO(log), MinesweeperAI(16, 16, 40)))
+        self.assertEqual(len(log.splitlines()) - 1, len(steps))
+        self.assertEqual(GameStatus.WON, steps[-1].result.status)
+        self.assertEqual("flag", steps[-1].action)
+
+    def test_mismatch(self) -> None:
+        lines = self.record_game().splitlines()
+        record = json.loads(lines[3])
+        record["cells"] += 1
+        lines[3] = json.dumps(record)
+        with self.assertRaises(ReplayError) as context:
+            for _ in replay(io.StringIO("\n".join(lines) + "\n")):
+                pass
+        self.assertEqual(4, context.exception.line)
+
+    def test_replay_lost_game(self) -> None:
+        # games lost on their first mine, with boards of different seeds, replay the same
+        for seed in range(10):
+            minesweeper = Minesweeper(16, 16, 40, seed=seed)
+            log = io.StringIO()
+            minesweeper.recorder = MoveRecorder(log, minesweeper)
+            index = 0
+            while minesweeper.status == GameStatus.ACTIVE:
+                minesweeper.reveal_cell(divmod(index, 16))
+                index += 1
+
+            steps = list(replay(io.StringIO(log.getvalue()), MinesweeperAI(16, 16, 40)))
+            self.assertEqual(index, len(steps))
+            self.assertEqual(GameStatus.LOST, steps[-1].result.status)
+            self.assertEqual(40, len(steps[-1].result.indexes))
@@ -0,0 +1,46 @@
+from unittest import TestCase
+import os
+import random
+import tempfile
+from game_status import GameStatus
+from mine_sweeper import Minesweeper
+from no_guess import Corpus, generate_board, generate_corpus, solve
+
+class NoGuessTests(TestCase):
+    def setUp(self) -> None:
+        handle, self.path = tempfile.mkstemp(suffix=".ngc")
+        os.close(handle)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        os.remove(self.path)
+        return super().tearDown()
+
+    def test_generate_board(self) -> None:
+        board, _ = generate_board(9, 9, 10, (4, 4), random.Random(3))
+        self.assertEqual(10, sum(board))
+        empty = bytes(81)
+        game = Minesweeper.from_state(9, 9, 10, board, empty, empty)
+        solve(game, (4, 4))
+        self.assertEqual(GameStatus.WON, game.status)
+
+    def test_too_many_mines(self) -> None:
+        # the AI can't get anywhere with this many mines, so every candidate is thrown away
+        with self.assertRaises(ValueError):
+            generate_board(16, 16, 150, (8, 8), random.Random(1), max_attempts=3)
+        with self.assertRaises(ValueError):
+            generate_corpus(self.path, 4, 16, 16, 150, processes=2, seed=1, max_attempts=3)
+
+    def test_corpus(self) -> None:
+        generate_corpus(self.path, 5, 16, 16, 40, processes=1, seed=2)
+        corpus = Corpus(self.path)
+        self.assertEqual(5, len(corpus))
+        self.assertEqual((8, 8), corpus.first_click)
+
+        for seed, game in corpus:
+            # each board is the one its seed generates, and can be solved without a guess
+            board, _ = generate_board(16, 16, 40, (8, 8), random.Random(seed))
+            self.assertEqual(board, game.get_state()[0])
+            self.assertIsNone(game.seed)
+            solve(game, corpus.first_click)
+            self.assertEqual(GameStatus.WON, game.status)
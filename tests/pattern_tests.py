@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+from pattern_cache import MINE, OUTSIDE, SAFE, SIZE, UNKNOWN, PatternCache
+
+class PatternTests(TestCase):
+    def setUp(self) -> None:
+        return super().setUp()
+
+    def test_one_two_one(self) -> None:
+        # a 1-2-1 under a row of unknown cells, the cells above the 1s are mines
+        window = [UNKNOWN] * SIZE + [UNKNOWN] * SIZE + [SAFE, 1, 2, 1, SAFE] + [SAFE] * (2 * SIZE)
+        cache = PatternCache()
+        self.assertEqual([(5, False), (6, True), (7, False), (8, True), (9, False)],
+                         sorted(cache.deduce(window)))
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+        # the same pattern turned on its side is found in the cache
+        turned = [window[c * SIZE + r] for r in range(SIZE) for c in range(SIZE)]
+        self.assertEqual([(1, False), (6, True), (11, False), (16, True), (21, False)],
+                         sorted(cache.deduce(turned)))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_lru_eviction(self) -> None:
+        cache = PatternCache(max_size=1)
+        first = [UNKNOWN] * SIZE + [SAFE, SAFE, 1, SAFE, SAFE] + [SAFE] * (3 * SIZE)
+        second = [UNKNOWN] * SIZE + [SAFE, SAFE, 0, SAFE, SAFE] + [SAFE] * (3 * SIZE)
+        cache.deduce(first)
+        cache.deduce(second)
+        cache.deduce(first)
+        self.assertEqual((0, 3), (cache.hits, cache.misses))
+        self.assertEqual(1, len(cache))
+
+    def test_same_constraints(self) -> None:
+        # a 2 next to a known mine says the same as a 1, and the corners aren't next to a number
+        window = [UNKNOWN] * SIZE + [SAFE, SAFE, 1, SAFE, SAFE] + [SAFE] * (3 * SIZE)
+        with_mine = [UNKNOWN] * SIZE + [SAFE, MINE, 2, SAFE, OUTSIDE] + [SAFE] * (3 * SIZE)
+        with_mine[SIZE - 1] = MINE
+        cache = PatternCache()
+        self.assertEqual(cache.deduce(window), cache.deduce(with_mine))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+        # a window without a number next to an unknown cell isn't looked up
+        self.assertEqual([], cache.deduce([UNKNOWN] * SIZE + [SAFE] * (4 * SIZE)))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
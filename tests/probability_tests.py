@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from mine_probability import find_components, mine_probabilities
+from mine_sweeper_ai import MinesweeperAI
+
+class ProbabilityTests(TestCase):
+    def setUp(self) -> None:
+        return super().setUp()
+
+    def test_components(self) -> None:
+        components = find_components([(frozenset({(0, 0), (0, 1)}), 1),
+                                      (frozenset({(0, 1), (0, 2)}), 1),
+                                      (frozenset({(5, 5), (5, 6)}), 1),
+                                      (frozenset(), 0)])
+        self.assertEqual([1, 2], sorted(len(component) for component in components))
+
+    def test_mine_count_is_combined(self) -> None:
+        constraints = [(frozenset({(0, 0), (0, 1)}), 1)]
+        unknown = {(0, 0), (0, 1), (3, 3), (3, 4)}
+
+        # the one mine left has to be in the sentence
+        probabilities = mine_probabilities(constraints, unknown, 1)
+        self.assertAlmostEqual(0.5, probabilities[(0, 0)])
+        self.assertAlmostEqual(0.0, probabilities[(3, 3)])
+
+        # two mines: one in the sentence, the other on one of the two cells outside of it
+        probabilities = mine_probabilities(constraints, unknown, 2)
+        self.assertAlmostEqual(0.5, probabilities[(0, 1)])
+        self.assertAlmostEqual(0.5, probabilities[(3, 4)])
+
+    def test_lowest_risk_move(self) -> None:
+        # a 1 in the corner of a 3x3 board with 2 mines.  Each cell next to the 1 has a
+        # one in three chance of being a mine, the cells away from it one in five.
+        ai = MinesweeperAI(3, 3, 2)
+        ai.add_knowledge((0, 0), 1)
+        self.assertIsNone(ai.get_safe_move())
+        probabilities = ai.get_mine_probabilities()
+        self.assertAlmostEqual(1 / 3, probabilities[(1, 1)])
+        self.assertAlmostEqual(1 / 5, probabilities[(2, 2)])
+        self.assertNotIn(ai.get_lowest_risk_move(), {(0, 1), (1, 0), (1, 1)})
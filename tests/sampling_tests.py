@@ -0,0 +1,58 @@
+from unittest import TestCase, skipUnless
+import time
+
+from mine_probability import mine_probabilities
+from mine_sampling import sample_component, sampling_available
+
+@skipUnless(sampling_available(), "NumPy is not installed")
+class SamplingTests(TestCase):
+    def setUp(self) -> None:
+        return super().setUp()
+
+    def test_matches_exact(self) -> None:
+        # a row of unknown cells along the top of the board, with a number under every third
+        # cell that sees the four cells above it
+        cells = [(0, j) for j in range(16)]
+        mines = {(0, 1), (0, 5), (0, 6), (0, 12)}
+        constraints = []
+        for j in range(0, 13, 3):
+            seen = frozenset(cells[j:j + 4])
+            constraints.append((seen, len(seen & mines)))
+        unknown = set(cells) | {(5, j) for j in range(40)}
+        exact = mine_probabilities(constraints, unknown, 12)
+
+        sampled = sample_component(frozenset(constraints), 8 / 40, time_budget=0.2, seed=7)
+        self.assertGreater(sampled.samples, 0)
+        for cell in cells:
+            self.assertAlmostEqual(exact[cell], sampled.probabilities[cell], delta=0.1)
+            self.assertLessEqual(sampled.lower[cell], sampled.probabilities[cell])
+            self.assertGreaterEqual(sampled.upper[cell], sampled.probabilities[cell])
+
+    def test_certain_cells(self) -> None:
+        # every cell of the first row is a mine and none of the second, so the estimates are 0
+        # and 1 and the bounds must stay numbers in range around them
+        mines = frozenset((0, j) for j in range(20))
+        safe = frozenset((1, j) for j in range(20))
+        component = frozenset([(mines, 20), (safe, 0), (frozenset([(0, 0), (1, 0)]), 1)])
+        sampled = sample_component(component, 0.3, time_budget=0.01, seed=3)
+        self.assertGreater(sampled.samples, 0)
+        for cell in mines | safe:
+            expected = 1.0 if cell in mines else 0.0
+            self.assertEqual(expected, sampled.probabilities[cell])
+            self.assertEqual(expected, sampled.lower[cell])
+            self.assertEqual(expected, sampled.upper[cell])
+
+    def test_budget_is_shared(self) -> None:
+        # six components too large to enumerate, one on every other row, sampled within one budget
+        constraints = []
+        for row in range(0, 12, 2):
+            cells = [(row, j) for j in range(40)]
+            for j in range(0, 37, 3):
+                constraints.append((frozenset(cells[j:j + 4]), 1))
+        unknown = {cell for (cells, _) in constraints for cell in cells}
+
+        start = time.perf_counter()
+        probabilities = mine_probabilities(constraints, unknown, 80, time_budget=0.05)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(unknown, set(probabilities))
+        self.assertLess(elapsed, 0.2)
@@ -12,3 +12,37 @@ class SentenceTests(TestCase):
         sentence.mark_safe((1,2))
         self.assertEqual({(0,1), (0,0), (0,2)}, sentence.cells)
         self.assertEqual(2, sentence.mine_count)
+
+    def test_subset_and_difference(self):
+        small = KnowledgeSentence({(1,1), (1,2)}, 1, 16)
+        large = KnowledgeSentence({(0,1), (1,1), (1,2), (2,3)}, 2, 16)
+        self.assertTrue(small.issubset(large))
+        self.assertFalse(large.issubset(small))
+
+        difference = large.difference(small)
+        self.assertEqual({(0,1), (2,3)}, difference.cells)
+        self.assertEqual(1, difference.mine_count)
+        self.assertEqual(2, len(difference))
+
+        # equal sentences are found as duplicates
+        same = KnowledgeSentence({(0,1), (2,3)}, 1, 16)
+        self.assertEqual(same, difference)
+        self.assertEqual(1, len({same, difference}))
+
+    def test_different_widths(self):
+        # without a width, the widest column is used, so these have widths 1 and 2
+        column = KnowledgeSentence({(0,0), (1,0)}, 1)
+        row = KnowledgeSentence({(0,0), (0,1)}, 1)
+        self.assertNotEqual(column, row)
+        self.assertEqual(2, len({column, row}))
+
+        # the same cells are equal whatever the widths
+        wide = KnowledgeSentence({(0,0), (1,0)}, 1, 16)
+        self.assertEqual(column, wide)
+        self.assertEqual(1, len({column, wide}))
+
+        small = KnowledgeSentence({(2,0)}, 1)
+        large = KnowledgeSentence({(0,1), (0,2), (0,3), (1,0)}, 1)
+        self.assertFalse(small.issubset(large))
+        self.assertTrue(small.issubset(KnowledgeSentence({(0,3), (2,0)}, 1)))
+        self.assertEqual({(0,3)}, KnowledgeSentence({(0,3), (2,0)}, 1).difference(small).cells)
@@ -0,0 +1,27 @@
+from unittest import TestCase
+
+from game_status import GameStatus
+from simulation import play_game, run_simulation
+
+class SimulationTests(TestCase):
+    def setUp(self) -> None:
+        return super().setUp()
+
+    def test_play_game(self) -> None:
+        result = play_game(9, 9, 10, seed=7)
+        self.assertNotEqual(GameStatus.ACTIVE, result.status)
+        self.assertGreater(result.moves, 0)
+        self.assertGreater(len(result.knowledge_times), 0)
+
+        # the same seed plays the same game
+        again = play_game(9, 9, 10, seed=7)
+        self.assertEqual(result.status, again.status)
+        self.assertEqual(result.moves, again.moves)
+        self.assertEqual(result.guesses, again.guesses)
+
+    def test_run_simulation(self) -> None:
+        report = run_simulation(6, 9, 9, 10, processes=1, seed=3)
+        self.assertEqual(6, report.games)
+        self.assertLessEqual(report.wins, report.games)
+        self.assertEqual(report.knowledge_calls > 0, report.knowledge_p50 > 0)
+        self.assertLessEqual(report.knowledge_p50, report.knowledge_p99)
@@ -0,0 +1,75 @@
+from unittest import TestCase
+import os
+import tempfile
+from game_status import GameStatus
+from mine_sweeper import Minesweeper
+from mine_sweeper_ai import MinesweeperAI
+from snapshot import VERSION, load_snapshot, save_snapshot
+
+class SnapshotTests(TestCase):
+    def setUp(self) -> None:
+        handle, self.path = tempfile.mkstemp(suffix=".snap")
+        os.close(handle)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        os.remove(self.path)
+        return super().tearDown()
+
+    def test_game_and_ai(self) -> None:
+        game = Minesweeper(16, 30, 99, seed=7, safe_cell=(8, 15))
+        ai = MinesweeperAI(16, 30, 99)
+        ai.add_knowledge_many(game.reveal_cell((8, 15)).codes)
+        for mine in ai.known_mine_cells:
+            game.flag_possible_mine(mine)
+        save_snapshot(self.path, game, ai)
+
+        with load_snapshot(self.path) as snapshot:
+            self.assertEqual(VERSION, snapshot.version)
+            self.assertEqual(7, snapshot.seed)
+            self.assertEqual(99, sum(snapshot.board))
+            loaded_game = snapshot.game()
+            loaded_ai = snapshot.ai()
+
+        self.assertEqual(game.get_state(), loaded_game.get_state())
+        self.assertEqual(ai.known_mine_cells, loaded_ai.known_mine_cells)
+        self.assertEqual(ai.known_safe_cells, loaded_ai.known_safe_cells)
+        self.assertEqual(ai.moves_made, loaded_ai.moves_made)
+        self.assertEqual({s for s in ai.knowledge_base if len(s) > 0}, set(loaded_ai.knowledge_base))
+        self.assertIn(loaded_ai.get_safe_move(), ai.known_safe_cells - ai.moves_made)
+
+        # both games and AIs carry on the same way
+        move = ai.get_lowest_risk_move()
+        result = game.reveal_cell(move)
+        loaded_result = loaded_game.reveal_cell(move)
+        self.assertEqual(dict(result.codes), dict(loaded_result.codes))
+        if result.status == GameStatus.ACTIVE:
+            ai.add_knowledge_many(result.codes)
+            loaded_ai.add_knowledge_many(loaded_result.codes)
+            self.assertEqual(ai.known_mine_cells, loaded_ai.known_mine_cells)
+            self.assertEqual(ai.known_safe_cells, loaded_ai.known_safe_cells)
+
+    def test_bad_file(self) -> None:
+        game = Minesweeper(4, 4, 2, [[True, False, False, True]] + [[False] * 4] * 3)
+        save_snapshot(self.path, game)
+        with load_snapshot(self.path) as snapshot:
+            self.assertIsNone(snapshot.seed)
+            self.assertFalse(snapshot.has_ai)
+            with self.assertRaises(ValueError):
+                snapshot.ai()
+
+        with open(self.path, "r+b") as file_data:
+            file_data.write(b"JSON")
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path)
+
+    def test_seed_range(self) -> None:
+        for seed in (0, 2 ** 64 - 1):
+            save_snapshot(self.path, Minesweeper(4, 4, 2, seed=seed))
+            with load_snapshot(self.path) as snapshot:
+                self.assertEqual(seed, snapshot.seed)
+
+        # seeds that don't fit are refused before anything is written
+        for seed in (-1, 2 ** 64):
+            with self.assertRaises(ValueError):
+                save_snapshot(self.path, Minesweeper(4, 4, 2, seed=seed))
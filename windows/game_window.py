@@ -1,4 +1,5 @@
 import pygame
+from ai_worker import AIReply, AIWorker, ERROR, KNOWN_MINES, MOVE
 from controls.button import Button
 from controls.mine_field import Minefield
 from controls.title import Title
@@ -13,86 +14,185 @@ class GameWindow():
     HEIGHT = 600
     WIDTH = 800
 
-    def __init__(self) -> None:
-        self.sprites = pygame.sprite.LayeredUpdates()
+    # the mine field takes the left of the window, the controls the right
+    FIELD_WIDTH = 600
+
+    # moves made per second by auto play
+    AUTO_RATE = 10.0
+
+    # Events posted to the main loop: a reply of the AI worker is ready, and it is time for the
+    # next move of auto play.  A reply is handled on the main loop's thread, like any other event.
+    AI_REPLY_EVENT = pygame.event.custom_type()
+    AUTO_PLAY_EVENT = pygame.event.custom_type()
+
+    # rows, cols and mines are the size of the board of every game.  Boards that don't fit in
+    # the window at the smallest cell size scroll, with a minimap under the controls.  The AI
+    # runs on a worker thread, so the window keeps responding while it works out a move, and
+    # auto play asks it for auto_rate moves a second, or fewer if it takes longer than that.
+    def __init__(self,
+                 rows: int = ROWS,
+                 cols: int = COLS,
+                 mines: int = MINES,
+                 auto_rate: float = AUTO_RATE) -> None:
+        if auto_rate <= 0:
+            raise ValueError("Auto play rate must be more than 0")
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.auto_rate = auto_rate
+        self.auto_play = False
+        self.ai_worker: AIWorker = None
+        self.sprites = pygame.sprite.LayeredDirty()
         self.screen = pygame.display.set_mode((GameWindow.WIDTH, GameWindow.HEIGHT))
         pygame.display.set_caption("Minesweeper AI")
-        
+
         # Add UI elements
-        self.sprites.add(Button(610, 25, 175, 50, "Restart", self.restart_game))
-        self.dead_text = Title(610, 100, 175, 50, "", None)
-        self.sprites.add(Title(610, 200, 175, 50, "AI Options", None))
-        self.sprites.add(Button(610, 275, 175, 50, "Make Move", self.ai_click_handler))
-        self.sprites.add(Button(610, 350, 175, 50, "Show Known Mines", self.show_ai_knowledge))
+        self.sprites.add(Button(610, 20, 175, 45, "Restart", self.restart_game))
+        self.dead_text = Title(610, 70, 175, 35, "", None)
+        self.ai_text = Title(610, 105, 175, 35, "", None)
+        self.sprites.add(Title(610, 145, 175, 30, "AI Options", None))
+        self.sprites.add(Button(610, 180, 175, 45, "Make Move", self.ai_click_handler))
+        self.auto_button = Button(610, 235, 175, 45, "Auto Play", self.toggle_auto_play)
+        self.sprites.add(self.auto_button)
+        self.sprites.add(Button(610, 290, 175, 45, "Show Known Mines", self.show_ai_knowledge))
         self.sprites.add(self.dead_text)
+        self.sprites.add(self.ai_text)
         self.restart_game()
 
-    # draw both the mine field and the buttons
-    def draw(self) -> None:
-        dirty = self.mine_field.cell_sprites.draw(self.screen)
-        pygame.display.update(dirty)
-
-        dirty = self.sprites.draw(self.screen)
+    # draw what changed in the mine field and the buttons, with a single display update.
+    # Returns True if anything was drawn.
+    def draw(self) -> bool:
+        if self.ai_worker.busy and self.ai_worker.busy_time >= 0.5:
+            self.ai_text.update_text(f"Thinking {self.ai_worker.busy_time:.1f} s")
+        dirty = self.mine_field.draw(self.screen) + self.sprites.draw(self.screen)
+        if len(dirty) == 0:
+            return False
         pygame.display.update(dirty)
-        
+        return True
 
     def update(self, event) ->None:
-        self.sprites.update(event)
-        self.mine_field.update(event)
-      
+        if event.type == GameWindow.AI_REPLY_EVENT:
+            self.handle_ai_replies()
+        elif event.type == GameWindow.AUTO_PLAY_EVENT:
+            if self.auto_play and not self.ai_worker.busy:
+                self.ai_click_handler()
+        else:
+            self.sprites.update(event)
+            self.mine_field.update(event)
+
+    # shows how the game ended, or clears the message while it goes on
+    def _show_status(self, status: GameStatus) -> None:
+        self.game_state = status
+        if status == GameStatus.LOST:
+            self.dead_text.update_text("You Lost")
+        elif status == GameStatus.WON:
+            self.dead_text.update_text("You Won!")
+        elif self.dead_text.text != "":
+            self.dead_text.update_text("")
+        if status != GameStatus.ACTIVE and self.auto_play:
+            self.toggle_auto_play()
+
+    # reveals a cell for the player or the AI, and gives the AI what it showed
+    def _reveal(self, cell) -> MoveResult:
+        result = self.minesweeper.reveal_cell(cell)
+        self._show_status(result.status)
+        if result.status == GameStatus.ACTIVE:
+            self.ai_worker.add_knowledge(result.codes)
+        return result
+
     def click_hander(self, i: int , j: int) -> MoveResult:
         if self.game_state == GameStatus.ACTIVE:
-            result =  self.minesweeper.reveal_cell((i,j))
-            self.game_state = result.status
-            if result.status == GameStatus.LOST:
-                self.dead_text.update_text("You Lost")
-            elif result.status == GameStatus.ACTIVE:
-                if self.dead_text.text != "":
-                    self.dead_text.update_text("")
-                for k, a in result.updates.items():
-                    self.ai.add_knowledge(k, int(a))
-            return result
+            return self._reveal((i, j))
         return None
-    
+
+    # asks the AI for a move, which is made when it replies.  Does nothing while the AI is
+    # still working out the last thing it was asked.
     def ai_click_handler(self) -> None:
-        if self.game_state == GameStatus.ACTIVE:
-            move = self.ai.get_safe_move()
-            if move is None:
-                self.dead_text.update_text("No safe moves")  
-                return
- 
-            ac= self.minesweeper.reveal_cell(move)
-            self.game_state = ac.status
-            if ac.status == GameStatus.LOST:
-                self.dead_text.update_text("You Lost")
-            else:
-                if self.dead_text.text != "":
-                    self.dead_text.update_text("")                
-                self.mine_field.update_cells(ac.updates)
+        if self.game_state == GameStatus.ACTIVE and not self.ai_worker.busy:
+            self.ai_worker.request_move()
 
-                for k, a in ac.updates.items():
-                    self.ai.add_knowledge(k, int(a))
+    def toggle_auto_play(self) -> None:
+        self.auto_play = not self.auto_play
+        if self.auto_play:
+            self.auto_button.update_text("Stop Auto Play")
+            pygame.time.set_timer(GameWindow.AUTO_PLAY_EVENT, max(1, round(1000 / self.auto_rate)))
+            self.ai_click_handler()
+        else:
+            self.auto_button.update_text("Auto Play")
+            pygame.time.set_timer(GameWindow.AUTO_PLAY_EVENT, 0)
 
     def show_ai_knowledge(self)-> None:
+        if not self.ai_worker.busy:
+            self.ai_worker.request_known_mines()
+
+    # makes the moves and flags the AI replied with
+    def handle_ai_replies(self) -> None:
+        reply = self.ai_worker.get_reply(block=False)
+        while reply is not None:
+            self._handle_ai_reply(reply)
+            reply = self.ai_worker.get_reply(block=False)
+
+    def _handle_ai_reply(self, reply: AIReply) -> None:
+        if reply.kind == ERROR:
+            self.ai_text.update_text("AI error")
+            if self.auto_play:
+                self.toggle_auto_play()
+            return
 
-        mine_locations = {}
-        for mine in self.ai.known_mine_cells:
-            result = self.minesweeper.flag_possible_mine(mine)
-            if result.status == GameStatus.WON:
-                self.dead_text.update_text("You Won!")        
-            for key,value in result.updates.items():
-                mine_locations[key] = value
-        
-        if len(mine_locations) > 0:
-            self.mine_field.update_cells(mine_locations)
+        self.ai_text.update_text(f"AI knows {reply.known_mines}/{self.mines} mines")
+        if reply.kind == MOVE and self.game_state == GameStatus.ACTIVE:
+            if reply.value is None:
+                self.dead_text.update_text("No moves left")
+                if self.auto_play:
+                    self.toggle_auto_play()
+                return
+            self.mine_field.update_cells(self._reveal(reply.value).codes)
+        elif reply.kind == KNOWN_MINES:
+            mine_locations = {}
+            for mine in reply.value:
+                result = self.minesweeper.flag_possible_mine(mine)
+                if result.status == GameStatus.WON:
+                    self._show_status(result.status)
+                for key,value in result.codes.items():
+                    mine_locations[key] = value
+
+            if len(mine_locations) > 0:
+                self.mine_field.update_cells(mine_locations)
 
+    # Starts a new game.  After the first one, the game, mine field and AI are reset in place
+    # rather than made again, so restarting a large board doesn't build it all over.
     def restart_game(self)-> None:
-        self.minesweeper = Minesweeper(GameWindow.ROWS, GameWindow.COLS, GameWindow.MINES)
-        self.mine_field = Minefield(GameWindow.HEIGHT, 
-                                    GameWindow.WIDTH, 
-                                    GameWindow.ROWS, 
-                                    GameWindow.COLS, 
-                                    self.click_hander)
-        self.ai = MinesweeperAI(GameWindow.ROWS, GameWindow.COLS)
+        if self.auto_play:
+            self.toggle_auto_play()
+        if self.ai_worker is None:
+            self.minesweeper = Minesweeper(self.rows, self.cols, self.mines)
+            self.mine_field = Minefield(GameWindow.HEIGHT,
+                                        GameWindow.FIELD_WIDTH,
+                                        self.rows,
+                                        self.cols,
+                                        self.click_hander,
+                                        pygame.Rect(610, 415, 175, 175))
+            self.ai_worker = AIWorker(MinesweeperAI(self.rows, self.cols, self.mines), self._notify)
+        else:
+            self.minesweeper.reset()
+            self.mine_field.reset()
+            if self.ai_worker.busy:
+                # the AI can't be stopped in the middle of working out a move, so rather than
+                # wait for it the new game gets a new AI, and the old reply is never read
+                self.ai_worker.stop()
+                self.ai_worker = AIWorker(MinesweeperAI(self.rows, self.cols, self.mines), self._notify)
+            else:
+                self.ai_worker.reset()
         self.dead_text.update_text("")
-        self.game_state = GameStatus.ACTIVE
\ No newline at end of file
+        self.ai_text.update_text("")
+        self.game_state = GameStatus.ACTIVE
+
+    # called on the worker thread, wakes up the main loop to handle the reply
+    @staticmethod
+    def _notify() -> None:
+        pygame.event.post(pygame.event.Event(GameWindow.AI_REPLY_EVENT))
+
+    # stops the AI worker, when the window is closed
+    def close(self) -> None:
+        self.ai_worker.stop()
+        pygame.time.set_timer(GameWindow.AUTO_PLAY_EVENT, 0)